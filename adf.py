@@ -0,0 +1,144 @@
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+MEMO_SIZE = 20000
+
+# Containers whose children are laid out as lists, and the node types that render as a list entry.
+LIST_TYPES = {"bulletList", "orderedList", "taskList", "decisionList"}
+ITEM_TYPES = {"listItem", "taskItem", "decisionItem"}
+# Blocks that end their own line (a space instead when inside a table cell).
+LINE_TYPES = {"paragraph", "heading", "blockquote", "panel", "mediaSingle", "mediaGroup", "rule", "blockCard", "embedCard"}
+# A list marker, table separator or opening code fence with nothing after it, once text is cut.
+DANGLING = re.compile(r"(?:^|\s+)(?:-|\||```)$")
+
+
+def _atom_text(node_type, attrs, in_cell):
+    """Text for leaf nodes, or None if the node is a container."""
+    if node_type == "hardBreak":
+        return " " if in_cell else "\n"
+    if node_type in ("mention", "status", "placeholder"):
+        return attrs.get("text") or ""
+    if node_type == "emoji":
+        return attrs.get("text") or attrs.get("shortName") or ""
+    if node_type in ("inlineCard", "blockCard", "embedCard"):
+        return attrs.get("url") or ""
+    if node_type == "date":
+        try:
+            return datetime.fromtimestamp(int(attrs.get("timestamp")) / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            return ""
+    return None
+
+
+def _trim(text, max_chars):
+    """Cut to max_chars at a word boundary and drop list / table / code markers left dangling."""
+    if len(text) > max_chars:
+        cut = text[:max_chars]
+        space = max(cut.rfind(" "), cut.rfind("\n")) if not text[max_chars].isspace() else max_chars
+        text = cut[:space] if space > 0 else cut
+    text = text.rstrip()
+    while True:
+        trimmed = DANGLING.sub("", text)
+        if trimmed == text:
+            return text
+        text = trimmed
+
+
+def adf_to_text(adf, max_chars=None) -> str:
+    """
+    Flatten a Jira ADF document to plain text with an explicit stack (no recursion).
+
+    Covers paragraphs, headings, nested bullet/ordered/task/decision lists, code blocks,
+    tables (cells joined with " | ", one row per line), panels, quotes, expands, layouts
+    and inline nodes such as mentions, emoji, links, status lozenges and dates.
+    With max_chars the walk stops as soon as that much text has been produced (children
+    are taken one at a time, so a wide container costs nothing past the cut), and the text
+    is cut at a word boundary.
+    """
+    if not adf:
+        return ""
+    if isinstance(adf, str):
+        return adf[:max_chars] if max_chars is not None else adf
+    out = []
+    size = 0
+    stopped = False
+    frames = []  # [children, next child index, child depth, child in table cell, separator, closing text]
+    node, depth, in_cell, visit = adf, 0, False, True
+    while True:
+        piece = ""
+        if visit:
+            visit = False
+            if isinstance(node, dict):
+                node_type = node.get("type")
+                attrs = node.get("attrs") or {}
+                piece = node.get("text", "") if node_type == "text" else _atom_text(node_type, attrs, in_cell)
+                if piece is not None:
+                    if node_type in ("blockCard", "embedCard"):
+                        piece += " " if in_cell else "\n"
+                else:
+                    end = ""
+                    if node_type in LINE_TYPES or node_type == "tableRow":
+                        end = " " if in_cell else "\n"
+                    elif node_type == "codeBlock":
+                        end = "```" + (" " if in_cell else "\n")
+                    sep = "| " if node_type == "tableRow" else ""  # cell blocks already end in a space
+                    frames.append([node.get("content") or [], 0, depth + 1 if node_type in LIST_TYPES else depth,
+                                   in_cell or node_type in ("tableCell", "tableHeader"), sep, end])
+                    piece = ""
+                    if node_type in ITEM_TYPES:
+                        piece = "  " * max(depth - 1, 0) + "- "
+                    elif node_type == "codeBlock":
+                        piece = "```"
+                    elif node_type in ("expand", "nestedExpand") and attrs.get("title"):
+                        piece = attrs["title"] + ("\n" if not in_cell else " ")
+        elif not frames:
+            break
+        else:
+            frame = frames[-1]
+            children, i = frame[0], frame[1]
+            if i < len(children):
+                frame[1] = i + 1
+                node, depth, in_cell, visit = children[i], frame[2], frame[3], True
+                if i:
+                    piece = frame[4]
+            else:
+                frames.pop()
+                piece = frame[5]
+        if piece:
+            out.append(piece)
+            size += len(piece)
+            if max_chars is not None and size >= max_chars:
+                stopped = True
+                break
+    lines = (line.rstrip() for line in "".join(out).split("\n"))
+    text = "\n".join(line for line in lines if line.strip()).strip()
+    if max_chars is not None and (stopped or len(text) > max_chars):
+        return _trim(text, max_chars)
+    return text
+
+
+_memo = OrderedDict()  # (issue key, updated, max_chars) -> text
+_memo_lock = threading.Lock()
+
+def issue_description_text(issue_key, updated, adf, max_chars=None) -> str:
+    """
+    adf_to_text memoized by issue key and `updated` timestamp, so unchanged issues are
+    only flattened once per process. Falls back to an uncached walk without a key.
+    """
+    if not issue_key or not updated:
+        return adf_to_text(adf, max_chars)
+    memo_key = (issue_key, str(updated), max_chars)
+    with _memo_lock:
+        text = _memo.get(memo_key)
+        if text is not None:
+            _memo.move_to_end(memo_key)
+            return text
+    text = adf_to_text(adf, max_chars)
+    with _memo_lock:
+        _memo[memo_key] = text
+        while len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return text
@@ -0,0 +1,204 @@
+import re
+import threading
+from collections import Counter
+from datetime import datetime
+
+
+_SPRINT = re.compile(r"([Ss]\d+)")
+
+
+def dashboard_sprint(sprint):
+    """The dashboard's sprint label: the first S<number> in the sprint name, upper-cased."""
+    m = _SPRINT.search(str(sprint))
+    return m.group(1).upper() if m else None
+
+
+def _day(dt):
+    return dt.date() if isinstance(dt, datetime) else None
+
+
+def _nested(table, key, factory=Counter):
+    found = table.get(key)
+    if found is None:
+        found = table[key] = factory()
+    return found
+
+
+def _bump(counter, key, sign):
+    n = counter[key] + sign
+    if n:
+        counter[key] = n
+    else:
+        del counter[key]
+
+
+class DashboardBucket:
+    """Dashboard counts and rows for one (sprint label, created day)."""
+
+    def __init__(self):
+        self.status = Counter()
+        self.team = Counter()
+        self.closed_by = Counter()
+        self.open_by = Counter()
+        self.rows = {}  # id(row) -> row: deltas pass the very row objects that were counted
+        self.refs = Counter()  # id(row) -> times that row object is in the dataset
+
+
+class Aggregates:
+    """
+    Counts over normalized NLQ rows, kept current by per-row deltas.
+
+    Built once from the loaded rows; after that NLQDataset calls add / remove for each
+    row that enters or leaves, so one issue update costs a few counter bumps and every
+    count-style question or dashboard metric is a lookup. Categories come out in the order
+    they were first counted (data order at build time, like Categorical.value_counts), and
+    a value whose count drops to zero is forgotten. Case-insensitive keys use `.lower()`
+    with None as "", the same as Categorical.ids_ci.
+    """
+
+    def __init__(self, rows=()):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.status = Counter()
+        self.category = Counter()
+        self.team = Counter()
+        self.team_ci = Counter()
+        self.team_ci_done = Counter()
+        self.assignee_name_ci = Counter()
+        self.assignee_email_ci = Counter()
+        self.assignee_both_ci = Counter()  # rows whose name and email share the key
+        self.open_member = Counter()
+        self.backlog_team = Counter()
+        self.sprint_ci = Counter()
+        self.sprint_ci_done = Counter()
+        self.sprint_ci_assigned = Counter()
+        self.sprint_team = {}
+        self.sprint_open_member = {}
+        self.dashboard = {}  # (sprint label, created day) -> DashboardBucket
+        self.keys = {}  # lower-cased issue key -> rows with it, in the order they were added
+        for row in rows:
+            self._apply(row, 1)
+
+    def add(self, row):
+        with self._lock:
+            self._apply(row, 1)
+
+    def remove(self, row):
+        with self._lock:
+            self._apply(row, -1)
+
+    def _apply(self, row, sign):
+        category = row["statusCategory"]
+        done = category == "Done"
+        team = row["team"]
+        sprint = (row["sprint"] or "").lower()
+        email = row["assigneeEmail"]
+        name_key, email_key = (row["assigneeName"] or "").lower(), (email or "").lower()
+        member = email or row["assigneeName"]
+
+        self.total += sign
+        key = (row["key"] or "").lower()
+        if sign > 0:
+            _nested(self.keys, key, list).append(row)
+        else:
+            same = self.keys[key]
+            del same[next(i for i, r in enumerate(same) if r is row)]
+            if not same:
+                del self.keys[key]
+        _bump(self.status, row["status"], sign)
+        _bump(self.category, category, sign)
+        _bump(self.team, team, sign)
+        _bump(self.team_ci, (team or "").lower(), sign)
+        _bump(self.assignee_name_ci, name_key, sign)
+        _bump(self.assignee_email_ci, email_key, sign)
+        if name_key == email_key:
+            _bump(self.assignee_both_ci, name_key, sign)
+        _bump(self.sprint_ci, sprint, sign)
+        _bump(_nested(self.sprint_team, sprint), team, sign)
+        if email:
+            _bump(self.sprint_ci_assigned, sprint, sign)
+        if done:
+            _bump(self.team_ci_done, (team or "").lower(), sign)
+            _bump(self.sprint_ci_done, sprint, sign)
+        elif member:
+            _bump(self.open_member, member, sign)
+            _bump(_nested(self.sprint_open_member, sprint), member, sign)
+        if category == "To Do" and row["sprint"] is None:
+            _bump(self.backlog_team, team, sign)
+
+        bucket_key = (dashboard_sprint(row["sprint"]), _day(row["created"]))
+        bucket = _nested(self.dashboard, bucket_key, DashboardBucket)
+        assignee = row["assigneeName"] or "Unassigned"
+        if row["status"] is not None:
+            _bump(bucket.status, row["status"], sign)
+        if team is not None:
+            _bump(bucket.team, team, sign)
+        if (row["status"] or "").lower() == "done":
+            _bump(bucket.closed_by, assignee, sign)
+        else:
+            _bump(bucket.open_by, assignee, sign)
+        if sign > 0:
+            bucket.rows[id(row)] = row
+        _bump(bucket.refs, id(row), sign)
+        if sign < 0 and id(row) not in bucket.refs:
+            del bucket.rows[id(row)]
+            if not bucket.rows:
+                del self.dashboard[bucket_key]
+
+    def count(self, name, key):
+        with self._lock:
+            return getattr(self, name)[key]
+
+    def issue(self, key):
+        """The row for an issue key, matched case-insensitively, or None."""
+        with self._lock:
+            found = self.keys.get((key or "").lower())
+            return found[0] if found else None
+
+    def assigned_to(self, person):
+        """Rows whose assignee name or email is `person`, case-insensitively."""
+        key = (person or "").lower()
+        with self._lock:
+            return self.assignee_name_ci[key] + self.assignee_email_ci[key] - self.assignee_both_ci[key]
+
+    def backlog(self):
+        with self._lock:
+            return sum(self.backlog_team.values())
+
+    def sprint(self, name):
+        """(total, done, assigned) for the sprint, matched case-insensitively."""
+        key = (name or "").lower()
+        with self._lock:
+            return self.sprint_ci[key], self.sprint_ci_done[key], self.sprint_ci_assigned[key]
+
+    def team_closed(self, team):
+        """(total, done) for the team, matched case-insensitively."""
+        key = (team or "").lower()
+        with self._lock:
+            return self.team_ci[key], self.team_ci_done[key]
+
+    def counts(self, name, key=None):
+        """A copy of one counter (or of a sprint's team / open-member counter) as a dict."""
+        with self._lock:
+            counter = getattr(self, name)
+            if key is not None:
+                counter = counter.get(key.lower(), {})
+            return dict(counter)
+
+    def dashboard_report(self, sprint=None, start_date=None, end_date=None):
+        """Merged dashboard counts and rows for one sprint label and created-date range (inclusive)."""
+        merged = DashboardBucket()
+        with self._lock:
+            for (label, day), bucket in self.dashboard.items():
+                if sprint and label != sprint:
+                    continue
+                if (start_date or end_date) and day is None:
+                    continue
+                if (start_date and day < start_date) or (end_date and day > end_date):
+                    continue
+                merged.status.update(bucket.status)
+                merged.team.update(bucket.team)
+                merged.closed_by.update(bucket.closed_by)
+                merged.open_by.update(bucket.open_by)
+                merged.rows.update(bucket.rows)
+        return merged
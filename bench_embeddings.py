@@ -0,0 +1,68 @@
+"""
+Memory vs. accuracy of compact embedding storage.
+
+    python bench_embeddings.py [corpus.txt] [--n 5000]
+
+corpus.txt holds one ticket text per line; without it a synthetic corpus is built by
+mixing embeddings.BACKEND_FIXTURES. For every storage mode it prints resident bytes
+(and the projection to 100k tickets), the cosine_sim error on random ticket pairs, and
+how often detect_teams still picks the same team as full float32 vectors.
+"""
+import sys
+
+import numpy as np
+
+from embeddings import BACKEND_FIXTURES, CompactEmbeddings, classify_vectors, cosine_sim, embed_texts
+
+
+MODES = [
+    ("float32", np.float32, None),
+    ("float16", np.float16, None),
+    ("float16 + PCA 192", np.float16, 192),
+    ("float16 + PCA 128", np.float16, 128),
+    ("float16 + PCA 64", np.float16, 64),
+]
+
+
+def synthetic_corpus(n, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = []
+    for i in range(n):
+        picks = rng.choice(len(BACKEND_FIXTURES), size=rng.integers(1, 4), replace=False)
+        texts.append(f"[{i}] " + ". ".join(BACKEND_FIXTURES[p] for p in picks))
+    return texts
+
+
+def run(texts, pairs=2000, seed=0):
+    keys = [f"T-{i}" for i in range(len(texts))]
+    vectors = embed_texts(texts)
+    reference_teams = classify_vectors(vectors)
+    rng = np.random.default_rng(seed)
+    a, b = rng.integers(0, len(texts), size=(2, pairs))
+    reference_cos = np.array([cosine_sim(vectors[i], vectors[j]) for i, j in zip(a, b)])
+
+    print(f"{len(texts)} tickets, {vectors.shape[1]} dims\n")
+    print(f"{'mode':<20}{'bytes':>12}{'MB @100k':>10}{'cos err mean':>14}{'cos err max':>13}{'team agree':>12}")
+    for name, dtype, dims in MODES:
+        store = CompactEmbeddings(keys, vectors, dtype=dtype, dims=dims)
+        restored = store.to_float32()
+        cos = np.array([cosine_sim(restored[i], restored[j]) for i, j in zip(a, b)])
+        err = np.abs(cos - reference_cos)
+        agree = np.mean([x == y for x, y in zip(classify_vectors(restored), reference_teams)])
+        per_100k = store.nbytes / len(texts) * 100_000 / 2**20
+        print(f"{name:<20}{store.nbytes:>12,}{per_100k:>10.1f}{err.mean():>14.5f}{err.max():>13.5f}{agree:>12.2%}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    n = 5000
+    if "--n" in args:
+        i = args.index("--n")
+        n = int(args[i + 1])
+        del args[i:i + 2]
+    if args:
+        with open(args[0], encoding="utf-8") as fh:
+            corpus = [line.strip() for line in fh if line.strip()][:n]
+    else:
+        corpus = synthetic_corpus(n)
+    run(corpus)
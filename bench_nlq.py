@@ -0,0 +1,248 @@
+"""
+Conformance and speed of the NLQ intent router and the dataset's Columns view.
+
+    python bench_nlq.py [--random 5000] [--repeat 20] [--issues 20000]
+
+Checks that jira_nlq.INTENT_ROUTER picks the same intent, with the same groups, as
+trying the original question bank (BASELINE_PATTERNS, a frozen copy, in order) one
+pattern after another over the HELP_TEXT questions, variations of them (including
+letters such as 'ı' and 'ſ' that re.I matches to ASCII), adversarial inputs built to
+make the `.*` patterns backtrack, and random mixes of intent fragments. Then times both
+over each corpus.
+
+Then edits one row of a fake_jira dataset at a time and checks that columns() patches
+its indexed view rather than rebuilding it, and that the patched view answers every
+lookup like one built from scratch. Exits non-zero on any disagreement.
+"""
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import fake_jira
+from intent_router import route_sequential
+from jira_nlq import HELP_TEXT, INTENT_PATTERNS, INTENT_ROUTER, MAX_QUERY_CHARS, normalize_issue
+from nlq_dataset import Columns, NLQDataset
+
+
+# the question bank as it was before routing, kept here so a change to INTENT_PATTERNS is caught
+BASELINE_PATTERNS = [
+    r"how many tickets.* in backlog|backlog.* size|how many.* backlog tickets",
+    r"how many tickets.* in sprint ([\w\s-]+)",
+    r"(?:how many tickets.* assigned to|tickets for) (.+)",
+    r"how many.* unassigned tickets|number of unassigned tickets|unassigned ticket count",
+    r"what percentage.* closed|closed tickets percentage|percent.* closed tickets",
+    r"how many.* closed.* last week|closed tickets.* last week",
+    r"how many.* closed.* last (\d+)\s*days|closed tickets.* last (\d+)\s*days",
+    r"how many tickets.* in progress|in progress ticket count|number of.* in progress",
+    r"list.* active tickets|show.* active tickets",
+    r"list tickets by status|ticket count by status|tickets by status",
+    r"list.* closed tickets|show.* closed tickets",
+    r"which team has the most tickets|team with most tickets",
+    r"which team has the least tickets|team with least tickets",
+    r"what percentage of tickets for (.+) are closed",
+    r"show.* backlog tickets for (.+)|backlog for (.+)",
+    r"who is the most efficient member of (.+)|most efficient in (.+)",
+    r"who is the least active member of (.+)|least active in (.+)",
+    r"which member has the most unclosed tickets|most open tickets by member",
+    r"who closed the most tickets last month",
+    r"who is best suited for ticket ([A-Z]+-\d+)|best person for ([A-Z]+-\d+)",
+    r"how many tickets.* created.* last week",
+    r"how many tickets.* resolved.* last week",
+    r"list tickets in (?:to do|todo) for more than (\d+)\s*days",
+    r"list tickets in progress for more than (\d+)\s*days",
+    r"which tickets changed.* last 24 hours",
+    r"which tickets.* idle for more than (\d+)\s*days",
+    r"how many.* unassigned.* in sprint ([\w\s-]+)",
+    r"which members in sprint ([\w\s-]+) are overloaded|overloaded members in sprint ([\w\s-]+)",
+    r"which team in sprint ([\w\s-]+) is handling the most tickets|team with most tickets in sprint ([\w\s-]+)",
+    r"closure rate for sprint ([\w\s-]+)",
+    r"backlog size by team",
+    r"backlog growth.* last month",
+    r"backlog tickets older than (\d+)\s*days",
+]
+REFERENCE = [(re.compile(pattern, re.I), None) for pattern in BASELINE_PATTERNS]
+KEYWORDS = [keyword for _, keyword, *_ in INTENT_PATTERNS]
+
+
+def real_queries():
+    questions = [line[2:].strip() for line in HELP_TEXT.splitlines() if line.startswith("- ")]
+    variations = []
+    for q in questions:
+        variations += [q.lower(), q.upper(), f"hey, {q.lower()} thanks", q.rstrip("?") + " please?"]
+        # letters re.I matches to ASCII but str.lower / casefold leave alone
+        variations += [q.lower().replace("i", "ı"), q.upper().replace("I", "İ"),
+                       q.lower().replace("s", "ſ"), q.lower().replace("k", "K")]
+    return questions + variations + [
+        "how many tickets in sprint s1 are unassigned?",
+        "how many tickets closed in the last 30 days",
+        "closed tickets in the last 5 days",
+        "tickets for Backend",
+        "backlog for QA team",
+        "team with most tickets in sprint Sprint 3",
+        "best person for fake-12",
+        "what is the backlog size by team",
+        "list tickets in progress for more than 3 days",
+        "which tickets have been idle for more than 10 days in QA",
+        "how many ſprint tickets are cloſed",  # long s: re.I folds it to s
+        "backlog K items",  # Kelvin sign folds to k
+        "lıst all actıve tickets",  # dotless i: re.I matches it to i, casefold() keeps it
+        "how many tickets are ın sprint s1",
+        "which tıckets changed in the last 24 hours",
+        "what's the weather",
+        "",
+    ]
+
+
+def adversarial_queries():
+    fill = MAX_QUERY_CHARS
+    return [
+        ("how many tickets " * 40)[:fill],
+        ("how many " * 60)[:fill],
+        ("backlog " * 70)[:fill],
+        ("closed tickets " * 40)[:fill],
+        ("list " * 100)[:fill],
+        ("show " * 99)[:fill - 15] + "active ticket",
+        ("which tickets " * 40)[:fill],
+        ("in sprint " * 50)[:fill],
+        ("how many tickets in sprint " + "a" * fill)[:fill],
+        ("tickets for " + "x " * fill)[:fill],
+        ("a" * fill),
+        ("how many " + "x" * (fill - 30) + " unassigned tickets")[:fill],
+    ]
+
+
+def random_queries(n, seed=0):
+    rng = random.Random(seed)
+    fragments = [line[2:].strip(" ?") for line in HELP_TEXT.splitlines() if line.startswith("- ")]
+    words = " ".join(fragments).split() + KEYWORDS + ["30", "s1", "SCRUM-4", "days", "?", "ın", "lıst", "ſhow"]
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.5:
+            parts = rng.sample(fragments, rng.randint(1, 3))
+        else:
+            parts = [rng.choice(words) for _ in range(rng.randint(2, 25))]
+        out.append(" ".join(parts)[:MAX_QUERY_CHARS])
+    return out
+
+
+def outcome(patterns, index, match):
+    """(pattern source, matched text, groups), so intents compare by pattern, not position."""
+    return (patterns[index], match.group(0), match.groups()) if match else (None, None, None)
+
+
+def conformance(queries):
+    routed = [pattern.pattern for pattern, *_ in INTENT_PATTERNS]
+    mismatches = []
+    for q in queries:
+        expected = outcome(BASELINE_PATTERNS, *route_sequential(REFERENCE, q))
+        got = outcome(routed, *INTENT_ROUTER.route(q))
+        if expected != got:
+            mismatches.append((q, expected, got))
+    return mismatches
+
+
+def timed(route, queries, repeat):
+    worst = 0.0
+    t = time.perf_counter()
+    for _ in range(repeat):
+        for q in queries:
+            start = time.perf_counter()
+            route(q)
+            worst = max(worst, time.perf_counter() - start)
+    total = time.perf_counter() - t
+    return total / (repeat * len(queries)) * 1e6, worst * 1e6
+
+
+def fake_rows(n_issues, seed=0):
+    rows = []
+    for issue in fake_jira.generate_project(n_issues, seed=seed)["issues"]:
+        row = normalize_issue(issue)
+        row["team"] = issue["fields"]["labels"][0]  # the source team, so no model is needed
+        rows.append(row)
+    return rows
+
+
+def view_differences(view, fresh):
+    """Names of the lookups where a patched view disagrees with a freshly built one."""
+    bad = []
+    for name in Columns.FIELDS:
+        a, b = getattr(view, name), getattr(fresh, name)
+        if [a.categories[c] for c in a.codes] != [b.categories[c] for c in b.codes]:
+            bad.append(name)
+            continue
+        for value in b.categories:
+            if not np.array_equal(a.ids(value), b.ids(value)) or not np.array_equal(a.ids_ci(value), b.ids_ci(value)):
+                bad.append(f"{name}={value!r}")
+    now = datetime.now(timezone.utc)
+    for field in Columns.TIMES:
+        for days in (1, 7, 30, 365):
+            cutoff = now - timedelta(days=days)
+            if not (np.array_equal(view.since(field, cutoff), fresh.since(field, cutoff))
+                    and np.array_equal(view.before(field, cutoff), fresh.before(field, cutoff))):
+                bad.append(f"{field} {days}d")
+    return bad
+
+
+def column_deltas(n_issues=20000, repeat=5):
+    rows = fake_rows(n_issues)
+    data = NLQDataset(rows)
+    start = time.perf_counter()
+    data.columns().build_indexes()
+    build = time.perf_counter() - start
+    now = datetime.now(timezone.utc)
+    edits = [
+        ("replace", lambda k: data.__setitem__(k, dict(data[k], status="Done", statusCategory="Done", resolved=now))),
+        ("insert newest", lambda k: data.insert(0, dict(rows[k], key=f"BENCH-{k}"))),
+        ("delete", lambda k: data.__delitem__(len(data) // 3)),
+        ("append", lambda k: data.append(dict(rows[k], key=f"BENCH-{k}", sprint="Bench sprint"))),
+    ]
+    print(f"\nColumns view over {len(data)} rows: full build {build * 1e3:.0f} ms")
+    failed = 0
+    for name, edit in edits:
+        times = []
+        for k in range(repeat):
+            edit(k)
+            start = time.perf_counter()
+            view = data.columns()
+            times.append(time.perf_counter() - start)
+        # a rebuilt view starts with no indexes; a patched one keeps the ones built above
+        rebuilt = view.sprint._by_code is None or not view._time_order
+        bad = view_differences(view, Columns(list(data)))
+        failed += rebuilt + len(bad)
+        print(f"  {name:<14}{sorted(times)[repeat // 2] * 1e3:>8.1f} ms  {'REBUILT' if rebuilt else 'patched'}  {', '.join(bad[:5]) or 'matches a fresh build'}")
+    return failed
+
+
+def run(n_random=5000, repeat=20):
+    corpora = [("real", real_queries()), ("adversarial", adversarial_queries()), ("random mixes", random_queries(n_random))]
+    failed = 0
+    for name, queries in corpora:
+        mismatches = conformance(queries)
+        failed += len(mismatches)
+        print(f"{name:<14}{len(queries):>7} queries, {len(mismatches)} mismatches")
+        for q, expected, got in mismatches[:5]:
+            print(f"  {q[:80]!r}\n    sequential {expected}\n    router     {got}")
+
+    print(f"\n{'corpus':<14}{'sequential µs':>15}{'router µs':>11}{'speedup':>9}{'worst seq µs':>14}{'worst router µs':>17}")
+    for name, queries in corpora:
+        seq_mean, seq_worst = timed(lambda q: route_sequential(REFERENCE, q), queries, repeat)
+        router_mean, router_worst = timed(INTENT_ROUTER.route, queries, repeat)
+        print(f"{name:<14}{seq_mean:>15.1f}{router_mean:>11.1f}{seq_mean / router_mean:>8.1f}x{seq_worst:>14.0f}{router_worst:>17.0f}")
+    return failed
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--random": 5000, "--repeat": 20, "--issues": 20000}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = int(args[i + 1])
+            del args[i:i + 2]
+    failed = run(options["--random"], options["--repeat"])
+    failed += column_deltas(options["--issues"])
+    sys.exit(1 if failed else 0)
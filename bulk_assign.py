@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import jira_http
+
+
+WRITE_WORKERS = int(os.getenv("JIRA_WRITE_WORKERS", 8))
+WRITE_RATE = float(os.getenv("JIRA_WRITE_RATE", 10))  # assignee PUTs per second across all workers
+WRITE_ATTEMPTS = 3
+
+
+class TokenBucket:
+    """Blocking rate limiter: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def _issue_key(issue):
+    if isinstance(issue, str):
+        return issue
+    return issue["key"] if isinstance(issue, dict) else issue.key
+
+
+def _current_account_id(issue):
+    if isinstance(issue, str):
+        return None
+    if isinstance(issue, dict):
+        return ((issue.get("fields") or {}).get("assignee") or {}).get("accountId")
+    return getattr(getattr(issue.fields, "assignee", None), "accountId", None)  # jira.Issue
+
+
+def put_assignee(issue_key, account_id, bucket=None, attempts=WRITE_ATTEMPTS):
+    """
+    One assignee PUT, rate limited by `bucket`. The jira_http session already retries
+    429/5xx with backoff, so only connection errors are tried again here, up to `attempts`
+    times. Returns (ok, error message).
+    """
+    error = None
+    for attempt in range(attempts):
+        if bucket:
+            bucket.acquire()
+        try:
+            r = jira_http.put(f"/rest/api/3/issue/{issue_key}/assignee", {"accountId": account_id})
+        except requests.RequestException as e:
+            error = str(e)
+            time.sleep(jira_http.BACKOFF * 2 ** attempt)
+            continue
+        if r.status_code == 204:
+            return True, None
+        return False, f"HTTP {r.status_code}: {r.text[:200]}"
+    return False, error
+
+
+def assign_many(changes, workers=WRITE_WORKERS, rate=WRITE_RATE, attempts=WRITE_ATTEMPTS, progress=None):
+    """
+    Apply (issue, accountId) assignments concurrently. `issue` is a key, a raw issue dict or a
+    jira.Issue; changes without an accountId, repeats of a key, and issues already assigned
+    to that account are skipped. progress(done, total, key, outcome) is called from the calling
+    thread after every change, so it can drive UI widgets such as st.progress.
+
+    Returns {"succeeded": [key], "failed": [{"key", "error"}], "skipped": [{"key", "reason"}]}.
+    """
+    report = {"succeeded": [], "failed": [], "skipped": []}
+    changes = list(changes)
+    total = len(changes)
+    done = 0
+    todo = []
+    seen = set()
+    for issue, account_id in changes:
+        key = _issue_key(issue)
+        reason = None
+        if not account_id:
+            reason = "no Jira account"
+        elif key in seen:
+            reason = "duplicate change"
+        elif _current_account_id(issue) == account_id:
+            reason = "already assigned"
+        seen.add(key)
+        if reason:
+            report["skipped"].append({"key": key, "reason": reason})
+            done += 1
+            if progress:
+                progress(done, total, key, "skipped")
+        else:
+            todo.append((key, account_id))
+    if not todo:
+        return report
+
+    bucket = TokenBucket(rate)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo))), thread_name_prefix="jira-assign") as pool:
+        futures = {pool.submit(put_assignee, key, account_id, bucket, attempts): key for key, account_id in todo}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                ok, error = future.result()
+            except Exception as e:
+                ok, error = False, str(e)
+            if ok:
+                report["succeeded"].append(key)
+            else:
+                report["failed"].append({"key": key, "error": error})
+            done += 1
+            if progress:
+                progress(done, total, key, "succeeded" if ok else "failed")
+    return report
+
+
+def summarize(report) -> str:
+    return f"{len(report['succeeded'])} assigned, {len(report['failed'])} failed, {len(report['skipped'])} skipped"
@@ -1,28 +1,476 @@
 
-from sentence_transformers import SentenceTransformer
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
 import numpy as np
+from numpy.lib.format import open_memmap
+
+import teams
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks; each file still swaps in atomically
+    fcntl = None
+
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+BATCH_SIZE = 64
+TEXT_MAX_CHARS = 2000  # the model truncates at 256 word pieces, so longer descriptions are never seen
+CACHE_DIR = os.getenv("EMBED_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".embed_cache"))
+CACHE_CAPACITY = int(os.getenv("EMBED_CACHE_SIZE", 50000))  # 0 disables the on-disk cache
+WARM_UP = os.getenv("EMBED_WARM_UP", "1") != "0"
+STORE_DTYPE = os.getenv("EMBED_STORE_DTYPE", "float32")  # float16 halves resident ticket vectors
+
+# Inference backends: "torch" is the full-precision reference; "onnx" runs the exported
+# graph through onnxruntime; "onnx-int8" uses a dynamically int8-quantized export.
+BACKENDS = ("torch", "onnx", "onnx-int8")
+BACKEND = os.getenv("EMBED_BACKEND", "torch")
+ONNX_MODEL_PATH = os.getenv("EMBED_ONNX_MODEL_PATH", MODEL_NAME)  # hub id or a local export_quantized_model dir
+ONNX_INT8_FILE = os.getenv("EMBED_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")  # relative to ONNX_MODEL_PATH
+
+_models = {}  # backend -> SentenceTransformer
+_model_lock = threading.Lock()
+
+def _load_model(backend):
+    from sentence_transformers import SentenceTransformer
+    if backend == "torch":
+        return SentenceTransformer(MODEL_NAME)
+    if backend == "onnx":
+        return SentenceTransformer(ONNX_MODEL_PATH, backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(ONNX_MODEL_PATH, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+def get_model(backend: str = None):
+    """Load the SentenceTransformer on first use; safe to call from several threads."""
+    backend = backend or BACKEND
+    model = _models.get(backend)
+    if model is None:
+        with _model_lock:
+            model = _models.get(backend)
+            if model is None:
+                model = _models[backend] = _load_model(backend)
+    return model
+
+def model_id(backend: str = None) -> str:
+    backend = backend or BACKEND
+    if backend == "torch":
+        return MODEL_NAME
+    if ONNX_MODEL_PATH == MODEL_NAME:
+        return f"{MODEL_NAME}:{backend}"
+    # a local export gets its own cache entries, apart from the hub files
+    source = f"{ONNX_MODEL_PATH}:{ONNX_INT8_FILE}" if backend == "onnx-int8" else ONNX_MODEL_PATH
+    return f"{MODEL_NAME}:{backend}:{source}"
+
+def export_quantized_model(save_dir: str, config: str = "avx2") -> str:
+    """
+    Save a loadable ONNX copy of the model to save_dir plus an int8 dynamically quantized
+    graph (requires optimum[onnxruntime]). To use it, set EMBED_ONNX_MODEL_PATH=save_dir and
+    EMBED_ONNX_INT8_FILE to the returned path, which is relative to save_dir.
+    """
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    onnx_model = SentenceTransformer(MODEL_NAME, backend="onnx")
+    onnx_model.save(save_dir)  # config, tokenizer and pooling, so the directory loads on its own
+    export_dynamic_quantized_onnx_model(onnx_model, config, save_dir)
+    return f"onnx/model_qint8_{config}.onnx"
+
+def warm_up():
+    """
+    Start loading the model on a daemon thread so it overlaps with Jira I/O.
+    Returns the thread, or None if the model is already loaded or EMBED_WARM_UP=0.
+    """
+    if BACKEND in _models or not WARM_UP:
+        return None
+    thread = threading.Thread(target=get_model, name="embeddings-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk embedding cache with size-bounded LRU eviction.
+
+    Vectors live in a memory-mapped float32 matrix of `capacity` rows, with an aligned
+    array of keys (sha1 of model id + normalized text) and an array of last-use ticks
+    that gives the LRU order back on reopen. A hit is only trusted if the slot still
+    holds the same key, so replicas sharing the directory can't serve each other's rows.
+    Files are created under temporary names and swapped in with os.replace while holding
+    a lock file, so a replica never truncates a file another one has mapped, and never
+    opens a half-created set.
+    """
+
+    def __init__(self, directory, capacity):
+        self.directory = directory
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._vectors = self._keys = self._ticks = None
+        self._slots = OrderedDict()  # key -> slot, least recently used first
+        self._free = []
+        self._tick = 0
+        self._open()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.npy")
+
+    @contextmanager
+    def _file_lock(self):
+        with open(os.path.join(self.directory, "lock"), "a") as fh:
+            if fcntl:
+                fcntl.flock(fh, fcntl.LOCK_EX)  # released when the file is closed
+            yield
+
+    def _open(self):
+        if os.path.isdir(self.directory):
+            with self._file_lock():
+                self._load()
+
+    def _load(self):
+        try:
+            vectors = open_memmap(self._path("vectors"), mode="r+")
+            keys = open_memmap(self._path("keys"), mode="r+")
+            ticks = open_memmap(self._path("ticks"), mode="r+")
+        except (OSError, ValueError):
+            return
+        if vectors.shape[0] != self.capacity or keys.shape != (self.capacity,) or ticks.shape != (self.capacity,):
+            return  # resized: rebuilt on the next put
+        self._vectors, self._keys, self._ticks = vectors, keys, ticks
+        self._slots.clear()
+        used = np.flatnonzero(keys != b"")
+        for slot in used[np.argsort(ticks[used], kind="stable")]:
+            self._slots[bytes(keys[slot])] = int(slot)
+        self._free = np.flatnonzero(keys == b"")[::-1].tolist()
+        self._tick = int(ticks.max()) if len(used) else 0
+
+    def _create(self, dim):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._file_lock():
+            self._load()  # another replica may have created matching files meanwhile
+            if self._vectors is not None and self._vectors.shape[1] == dim:
+                return
+            made = []
+            for name, dtype, shape in (("vectors", np.float32, (self.capacity, dim)),
+                                       ("keys", "S40", (self.capacity,)),
+                                       ("ticks", np.int64, (self.capacity,))):
+                tmp = os.path.join(self.directory, f"{name}.{os.getpid()}.tmp")
+                made.append(open_memmap(tmp, mode="w+", dtype=dtype, shape=shape))
+                os.replace(tmp, self._path(name))  # mappings of the old file keep the old inode
+        self._vectors, self._keys, self._ticks = made
+        self._slots.clear()
+        self._free = list(range(self.capacity - 1, -1, -1))
+        self._tick = 0
+
+    def key(self, text: str, model_id: str = MODEL_NAME) -> bytes:
+        return hashlib.sha1(f"{model_id}\0{text}".encode("utf-8")).hexdigest().encode("ascii")
+
+    def _touch(self, key, slot):
+        self._slots.move_to_end(key)
+        self._tick += 1
+        self._ticks[slot] = self._tick
+
+    def get_many(self, keys):
+        """Returns a vector (or None on a miss) for every key."""
+        out = []
+        with self._lock:
+            for key in keys:
+                slot = self._slots.get(key)
+                if slot is not None and self._keys[slot] != key:
+                    del self._slots[key]
+                    slot = None
+                if slot is None:
+                    self.misses += 1
+                    out.append(None)
+                    continue
+                self.hits += 1
+                self._touch(key, slot)
+                out.append(np.array(self._vectors[slot]))
+        return out
+
+    def put_many(self, keys, vectors):
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vectors.shape[1]:
+                self._create(vectors.shape[1])
+            for key, vec in zip(keys, vectors):
+                slot = self._slots.get(key)
+                if slot is None:
+                    if self._free:
+                        slot = self._free.pop()
+                    else:
+                        _, slot = self._slots.popitem(last=False)
+                        self.evictions += 1
+                    self._slots[key] = slot
+                    self._keys[slot] = key
+                self._vectors[slot] = vec
+                self._touch(key, slot)
+
+    def flush(self):
+        with self._lock:
+            for arr in (self._vectors, self._keys, self._ticks):
+                if arr is not None:
+                    arr.flush()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._slots),
+            "capacity": self.capacity,
+        }
 
 
-model = SentenceTransformer("all-MiniLM-L6-v2")  
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    global _cache
+    if CACHE_CAPACITY <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(CACHE_DIR, CACHE_CAPACITY)
+        return _cache
+
+def cache_stats() -> dict:
+    cache = get_cache()
+    return cache.stats() if cache else {}
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").split())[:TEXT_MAX_CHARS]
+
+def _encode(texts, backend=None) -> np.ndarray:
+    return get_model(backend).encode(texts, batch_size=BATCH_SIZE, convert_to_numpy=True).astype(np.float32, copy=False)
 
 def embed_text(text: str) -> np.ndarray:
 
-    return model.encode([text], convert_to_numpy=True)[0]
+    return embed_texts([text])[0]
+
+def embed_texts(texts, backend: str = None) -> np.ndarray:
+    """
+    Encode many strings in a single model call; returns an (N, dim) float32 matrix.
+    Texts already in the on-disk cache skip inference entirely.
+    """
+    texts = [normalize_text(t) for t in texts]
+    if not texts:
+        return np.zeros((0, get_model(backend).get_sentence_embedding_dimension()), dtype=np.float32)
+    cache = get_cache()
+    if cache is None:
+        return _encode(texts, backend)
+    keys = [cache.key(t, model_id(backend)) for t in texts]
+    cached = cache.get_many(keys)
+    missing = {}  # key -> text, deduplicated
+    for key, text, vec in zip(keys, texts, cached):
+        if vec is None:
+            missing.setdefault(key, text)
+    fresh = {}
+    if missing:
+        vectors = _encode(list(missing.values()), backend)
+        cache.put_many(list(missing), vectors)
+        cache.flush()
+        fresh = dict(zip(missing, vectors))
+    return np.stack([vec if vec is not None else fresh[key] for key, vec in zip(keys, cached)])
+
+def normalize_rows(mat) -> np.ndarray:
+    mat = np.asarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+def chunked_dot(matrix, query, chunk=8192) -> np.ndarray:
+    """matrix @ query in float32, upcasting float16 storage one chunk at a time."""
+    if matrix.dtype == np.float32:
+        return matrix @ query
+    out = np.empty(len(matrix), dtype=np.float32)
+    for i in range(0, len(matrix), chunk):
+        out[i:i + chunk] = matrix[i:i + chunk].astype(np.float32) @ query
+    return out
+
+def fit_pca(vectors, dims: int) -> np.ndarray:
+    """
+    Top `dims` principal directions of the (uncentered) vectors, as a (dims, D) matrix.
+    Leaving the data uncentered keeps projected dot products close to the original
+    cosines, so thresholds like detect_teams' 0.3 still mean the same thing.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    _, _, vt = np.linalg.svd(vectors, full_matrices=False)
+    return np.ascontiguousarray(vt[:dims])
+
+
+class CompactEmbeddings:
+    """
+    Resident embeddings in a compact layout: normalized rows stored as float16 (or float32),
+    optionally projected onto `dims` PCA components fitted on the corpus, with an aligned
+    key array. get()/to_float32() give float32 vectors back in the original space.
+    """
+
+    def __init__(self, keys, vectors, dtype=np.float16, dims=None, components=None):
+        vectors = normalize_rows(vectors)
+        self.keys = np.asarray(list(keys), dtype=str)
+        if components is None and dims and dims < vectors.shape[1]:
+            components = fit_pca(vectors, dims)
+        self.components = components
+        self.vectors = np.ascontiguousarray(self.project(vectors).astype(dtype))
+        self.positions = {k: i for i, k in enumerate(self.keys.tolist())}
+
+    def project(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors if self.components is None else vectors @ self.components.T
+
+    def to_float32(self, rows=None) -> np.ndarray:
+        stored = self.vectors if rows is None else self.vectors[rows]
+        stored = stored.astype(np.float32)
+        return stored if self.components is None else stored @ self.components
+
+    def get(self, key) -> np.ndarray:
+        return self.to_float32([self.positions[key]])[0]
+
+    def scores(self, query) -> np.ndarray:
+        """Approximate cosine between a query vector and every stored row."""
+        return chunked_dot(self.vectors, self.project(normalize_rows(np.reshape(query, (1, -1)))[0]))
+
+    @property
+    def nbytes(self) -> int:
+        extra = 0 if self.components is None else self.components.nbytes
+        return self.vectors.nbytes + self.keys.nbytes + extra
 
 def cosine_sim(vec1: np.ndarray, vec2: np.ndarray) -> float:
-   
+
     vec1 = np.array(vec1)
     vec2 = np.array(vec2)
     return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
 
-def extract_text_from_jira_description(description: dict) -> str:
-    
-    if not description or "content" not in description:
-        return ""
-    parts = []
-    for block in description.get("content", []):
-        if "content" in block:
-            for inner in block["content"]:
-                if inner.get("type") == "text":
-                    parts.append(inner.get("text", ""))
-    return " ".join(parts).strip()
+def build_team_matrix(team_skills: dict, backend: str = None):
+    """Embed every team's skill text once; returns (team_names, normalized (T, dim) matrix)."""
+    names = list(team_skills)
+    return names, normalize_rows(embed_texts([team_skills[n] for n in names], backend))
+
+_team_centroids = {}  # (TEAM_SKILLS hash, backend) -> (team_names, matrix)
+_team_centroids_lock = threading.Lock()
+
+def team_skills_hash(team_skills: dict) -> str:
+    return hashlib.sha256(json.dumps(list(team_skills.items())).encode("utf-8")).hexdigest()
+
+def get_team_centroids(team_skills: dict = None, backend: str = None):
+    """
+    Process-wide team-embedding matrix, built once and keyed by a hash of the skills
+    config so edits to teams.TEAM_SKILLS invalidate it.
+    """
+    team_skills = teams.TEAM_SKILLS if team_skills is None else team_skills
+    backend = backend or BACKEND
+    key = (team_skills_hash(team_skills), backend)
+    with _team_centroids_lock:
+        if key not in _team_centroids:
+            for stale in [k for k in _team_centroids if k[1] == backend]:
+                del _team_centroids[stale]
+            _team_centroids[key] = build_team_matrix(team_skills, backend)
+        return _team_centroids[key]
+
+def classify_vectors(vectors, team_names=None, team_matrix=None, threshold=0.3, default="General", backend=None):
+    """Team label for each already-embedded issue vector, via one (N, dim) x (dim, T) product."""
+    if team_matrix is None:
+        team_names, team_matrix = get_team_centroids(backend=backend)
+    if not len(vectors):
+        return []
+    scores = normalize_rows(vectors) @ team_matrix.T
+    best = scores.argmax(axis=1)
+    best_scores = scores[np.arange(len(best)), best]
+    return [team_names[b] if s >= threshold else default for b, s in zip(best, best_scores)]
+
+def detect_teams(texts, team_names=None, team_matrix=None, threshold=0.3, default="General", backend=None):
+    """
+    Classify N issue texts with one batched encode and one matrix product.
+    Ties resolve to the first team in team_names, like the old per-team loops.
+    Uses the shared team centroids unless an explicit matrix is given.
+    """
+    texts = list(texts)
+    labels = [default] * len(texts)
+    idx = [i for i, t in enumerate(texts) if t and t.strip()]
+    if not idx:
+        return labels
+    vectors = embed_texts([texts[i] for i in idx], backend)
+    for i, label in zip(idx, classify_vectors(vectors, team_names, team_matrix, threshold, default, backend)):
+        labels[i] = label
+    return labels
+
+# Representative tickets per team, used to check that a faster backend classifies like torch.
+BACKEND_FIXTURES = [
+    "Login button misaligned on mobile Safari, CSS flexbox issue in the React header",
+    "Dropdown menu not keyboard accessible, fix ARIA roles in Vue component",
+    "Webpack build produces huge bundle, add code splitting and lazy loading",
+    "REST endpoint /orders returns 500 when JWT token is expired",
+    "Add rate limiting to the public GraphQL API using Redis",
+    "Kafka consumer lags behind, tune Spring Boot listener concurrency",
+    "Slow query on orders table, add composite index and review query plan",
+    "Set up nightly PostgreSQL backups and test point-in-time recovery",
+    "Shard the MongoDB events collection by tenant id",
+    "Jenkins pipeline fails on Docker image push to registry",
+    "Write Terraform module for the staging Kubernetes cluster with Helm charts",
+    "Add Prometheus alerts and Grafana dashboard for API latency",
+    "Automate regression suite with Selenium and run it in CI",
+    "Load test checkout flow with JMeter before release",
+    "Penetration test findings: stored XSS and missing CSP header",
+    "Rotate TLS certificates and enforce HSTS on all ingress hosts",
+    "GDPR data export request handling and IAM role review",
+    "Update onboarding documentation and sprint retrospective notes",
+    "Estimate and plan backlog items for next sprint with the team",
+    "Misc cleanup",
+]
+
+def check_backend_agreement(backend: str, texts=None, reference: str = "torch") -> dict:
+    """Compare detect_teams results of a backend against the reference backend on a fixture set."""
+    texts = BACKEND_FIXTURES if texts is None else list(texts)
+    expected = detect_teams(texts, backend=reference)
+    actual = detect_teams(texts, backend=backend)
+    mismatches = [(t, e, a) for t, e, a in zip(texts, expected, actual) if e != a]
+    return {
+        "backend": backend,
+        "reference": reference,
+        "checked": len(texts),
+        "agreement": 1 - len(mismatches) / len(texts) if texts else 1.0,
+        "mismatches": mismatches,
+    }
+
+def time_backend(backend: str, texts=None, repeats: int = 3) -> float:
+    """Best-of-N seconds per text for raw inference (bypasses the cache)."""
+    texts = [normalize_text(t) for t in (BACKEND_FIXTURES if texts is None else texts)]
+    get_model(backend)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _encode(texts, backend)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts)
+
+
+if __name__ == "__main__":
+    # python embeddings.py [backend ...] [--min-agreement 1.0]  -> agreement with torch and
+    # per-ticket latency; exits 1 if any backend agrees on fewer fixtures than required
+    args = sys.argv[1:]
+    min_agreement = 1.0
+    if "--min-agreement" in args:
+        i = args.index("--min-agreement")
+        min_agreement = float(args[i + 1])
+        del args[i:i + 2]
+    failed = []
+    for name in args or ["onnx-int8"]:
+        report = check_backend_agreement(name)
+        print(f"{name}: {report['agreement']:.1%} agreement with {report['reference']} "
+              f"on {report['checked']} fixtures, {time_backend(name) * 1000:.2f} ms/ticket "
+              f"(torch {time_backend('torch') * 1000:.2f} ms/ticket)")
+        for text, expected, actual in report["mismatches"]:
+            print(f"  - {expected} -> {actual}: {text}")
+        if report["agreement"] < min_agreement:
+            failed.append(name)
+    if failed:
+        print(f"Below {min_agreement:.1%} agreement: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,536 @@
+"""
+Local stand-in for the parts of Jira Cloud this app uses, for load and regression runs.
+
+    python fake_jira.py serve [--issues 5000] [--port 8080] [--latency 0.05] [--throttle 0.02]
+                              [--record calls.jsonl] [--replay calls.jsonl] [--upstream https://x.atlassian.net]
+    python fake_jira.py bench [--issues 50000] [--latency 0] [--throttle 0]
+
+`serve` seeds a synthetic project and listens until interrupted; point JIRA_URL (and
+PROJECT_KEY=FAKE, BOARD_ID=1) at it to run the app offline. --latency delays every
+response, --throttle answers that fraction of requests with 429. --record appends every
+exchange to a JSONL file, --replay answers from such a file instead of the synthetic
+project, and --upstream proxies to a real Jira (with EMAIL / API_TOKEN) so a recording can
+be captured once and replayed later. `bench` measures fetch, auto-assign and sprint
+rebalance throughput against an in-process server, through the app's own entry points
+(so it needs the embedding model), and exits non-zero if a second rebalance still moves
+anything.
+
+Served: /rest/api/{2,3}/search (startAt / maxResults / total, fields, a small JQL subset),
+/user/search, /issue (create and get), /issue/{key}/assignee, /serverInfo and the agile
+board sprint list, sprint creation and move-to-sprint.
+"""
+import hashlib
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import jira_http
+from teams import TEAM_MEMBERS, TEAM_SKILLS
+
+
+PROJECT = "FAKE"
+BOARD_ID = 1
+MAX_PAGE = 100  # Jira Cloud caps search pages at 100
+MAX_SPRINT_MOVE = 50
+
+STATUSES = {
+    "To Do": {"name": "To Do", "statusCategory": {"key": "new", "name": "To Do"}},
+    "In Progress": {"name": "In Progress", "statusCategory": {"key": "indeterminate", "name": "In Progress"}},
+    "Done": {"name": "Done", "statusCategory": {"key": "done", "name": "Done"}},
+}
+PRIORITIES = ["Highest", "High", "Medium", "Low", "Lowest"]
+ISSUE_TYPES = ["Bug", "Task", "Story", "Feature"]
+VERBS = ["Fix", "Add", "Investigate", "Refactor", "Update", "Document", "Improve", "Remove"]
+
+
+def jira_time(dt) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000%z")
+
+
+def account_id(email) -> str:
+    return "fake-" + hashlib.sha1(email.encode()).hexdigest()[:16]
+
+
+def make_user(email):
+    return {
+        "accountId": account_id(email),
+        "emailAddress": email,
+        "displayName": email.split("@")[0].replace(".", " ").title(),
+        "active": True,
+    }
+
+
+def adf(text):
+    return {"type": "doc", "version": 1, "content": [{"type": "paragraph", "content": [{"type": "text", "text": text}]}]}
+
+
+def generate_project(n_issues, project=PROJECT, seed=0, n_sprints=6, team_members=TEAM_MEMBERS):
+    """
+    Synthetic issues, users and sprints. Summaries mix a team's skill words, so team
+    detection has something to find; the source team is kept in `labels` for benchmarks
+    that should not depend on the embedding model.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    words = {team: skills.split() for team, skills in TEAM_SKILLS.items()}
+    team_names = sorted(words)
+    users = {email: make_user(email) for members in team_members.values() for email in members}
+    sprints = []
+    for i in range(n_sprints):
+        start = now - timedelta(days=14 * (n_sprints - 2 - i))
+        state = "closed" if i < n_sprints - 2 else ("active" if i == n_sprints - 2 else "future")
+        sprints.append({
+            "id": i + 1, "name": f"{project} Sprint {i + 1}", "state": state, "boardId": BOARD_ID,
+            "startDate": jira_time(start), "endDate": jira_time(start + timedelta(days=14)),
+        })
+    issues = []
+    for n in range(1, n_issues + 1):
+        team = rng.choice(team_names)
+        summary = f"{rng.choice(VERBS)} " + " ".join(rng.sample(words[team], 3))
+        description = " ".join(rng.sample(words[team], min(8, len(words[team]))))
+        created = now - timedelta(minutes=rng.randrange(60 * 24 * 365))
+        sprint = rng.choice(sprints) if rng.random() < 0.6 else None
+        if sprint and sprint["state"] == "closed":
+            status = "Done" if rng.random() < 0.9 else "To Do"
+        elif sprint and sprint["state"] == "active":
+            status = rng.choice(["To Do", "In Progress", "Done"])
+        else:
+            status = "To Do" if rng.random() < 0.8 else "Done"
+        members = team_members.get(team) or []
+        assignee = users[rng.choice(members)] if members and (status != "To Do" or rng.random() < 0.5) else None
+        updated = min(now, created + timedelta(minutes=rng.randrange(60 * 24 * 30)))
+        resolved = jira_time(updated) if status == "Done" else None
+        issues.append({
+            "id": str(10000 + n),
+            "key": f"{project}-{n}",
+            "fields": {
+                "summary": summary,
+                "description": adf(description),
+                "issuetype": {"name": rng.choice(ISSUE_TYPES)},
+                "status": STATUSES[status],
+                "assignee": assignee,
+                "priority": {"name": rng.choice(PRIORITIES)},
+                "created": jira_time(created),
+                "updated": jira_time(updated),
+                "resolutiondate": resolved,
+                "duedate": (created + timedelta(days=rng.randrange(7, 60))).strftime("%Y-%m-%d"),
+                "labels": [team],
+                jira_http.SPRINT_FIELD: [dict(sprint)] if sprint else None,
+                jira_http.STORY_POINTS_FIELD: rng.choice([1, 2, 3, 5, 8]),
+            },
+        })
+    return {"project": project, "issues": issues, "users": list(users.values()), "sprints": sprints}
+
+
+class JQLError(ValueError):
+    pass
+
+
+def _category_is(value):
+    value = value.strip('"').lower()
+    return lambda it: (it["fields"]["status"]["statusCategory"]["name"]).lower() == value
+
+
+def compile_jql(jql):
+    """
+    Predicate and [(sort key, reverse)] for the JQL this app sends: AND-ed project, sprint
+    (= id / IS EMPTY), statusCategory (= / !=), assignee IS [NOT] EMPTY and updated >= -Nm
+    clauses, with an optional ORDER BY over created, updated and key (comma-separated, each
+    ASC or DESC). Without one, issues come in key order. Anything else raises JQLError.
+    """
+    order = [("key", False)]
+    match = re.search(r"\s+order\s+by\s+(.+)$", jql, re.I)
+    if match:
+        jql = jql[:match.start()]
+        order = []
+        for term in match[1].split(","):
+            if not (m := re.fullmatch(r"\s*(created|updated|key)(?:\s+(asc|desc))?\s*", term, re.I)):
+                raise JQLError(f"Unsupported ORDER BY: {term.strip()}")
+            order.append((m[1].lower(), (m[2] or "asc").lower() == "desc"))
+    tests = []
+    for clause in re.split(r"\s+and\s+", jql.strip(), flags=re.I):
+        c = clause.strip()
+        if not c:
+            continue
+        if m := re.fullmatch(r'project\s*=\s*"?([\w-]+)"?', c, re.I):
+            tests.append(lambda it, p=m[1].upper(): it["key"].startswith(p + "-"))
+        elif re.fullmatch(r"sprint\s+is\s+empty", c, re.I):
+            tests.append(lambda it: not it["fields"].get(jira_http.SPRINT_FIELD))
+        elif m := re.fullmatch(r"sprint\s*=\s*(\d+)", c, re.I):
+            tests.append(lambda it, s=int(m[1]): any(x["id"] == s for x in it["fields"].get(jira_http.SPRINT_FIELD) or []))
+        elif m := re.fullmatch(r"statusCategory\s*(!?=)\s*(\"[^\"]+\"|\w+)", c, re.I):
+            test = _category_is(m[2])
+            tests.append(test if m[1] == "=" else (lambda it, t=test: not t(it)))
+        elif m := re.fullmatch(r"assignee\s+is\s+(not\s+)?empty", c, re.I):
+            tests.append(lambda it, want=bool(m[1]): bool(it["fields"].get("assignee")) == want)
+        elif m := re.fullmatch(r"updated\s*>=\s*-(\d+)m", c, re.I):
+            since = jira_time(datetime.now(timezone.utc) - timedelta(minutes=int(m[1])))
+            tests.append(lambda it, s=since: it["fields"]["updated"] >= s)
+        else:
+            raise JQLError(f"Unsupported JQL clause: {c}")
+
+    def sort_key(field):
+        if field == "key":
+            return lambda it: int(it["key"].rsplit("-", 1)[1])
+        return lambda it: it["fields"][field]
+
+    return (lambda it: all(t(it) for t in tests)), [(sort_key(field), reverse) for field, reverse in order]
+
+
+class FakeJira:
+    """In-memory Jira state plus request routing; thread-safe."""
+
+    def __init__(self, project=None, latency=0.0, throttle=0.0, retry_after=0, seed=0):
+        project = project or generate_project(0)
+        self.project = project["project"]
+        self.issues = {it["key"]: it for it in project["issues"]}
+        self.users = {u["accountId"]: u for u in project["users"]}
+        self.sprints = {s["id"]: s for s in project["sprints"]}
+        self.latency = latency
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.requests = defaultdict(int)  # "METHOD route" -> count
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._searches = {}  # jql -> (version, matching keys in order)
+        self.routes = [
+            ("GET", r"/rest/api/[23]/search", self.search),
+            ("GET", r"/rest/api/[23]/user/search", self.user_search),
+            ("PUT", r"/rest/api/[23]/issue/([\w-]+)/assignee", self.set_assignee),
+            ("GET", r"/rest/api/[23]/issue/([\w-]+)", self.get_issue),
+            ("POST", r"/rest/api/[23]/issue", self.create_issue),
+            ("GET", r"/rest/api/[23]/serverInfo", self.server_info),
+            ("GET", r"/rest/agile/1\.0/board/(\d+)/sprint", self.board_sprints),
+            ("POST", r"/rest/agile/1\.0/sprint", self.create_sprint),
+            ("POST", r"/rest/agile/1\.0/sprint/(\d+)/issue", self.move_to_sprint),
+        ]
+
+    def handle(self, method, path, query, body):
+        """Returns (status, payload or None, extra headers)."""
+        if self.latency:
+            time.sleep(self.latency)
+        for route_method, pattern, fn in self.routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                with self._lock:
+                    self.requests[f"{method} {pattern}"] += 1
+                    throttled = self.throttle and self._rng.random() < self.throttle
+                if throttled:
+                    return 429, {"errorMessages": ["Rate limit exceeded."]}, {"Retry-After": str(self.retry_after)}
+                try:
+                    return fn(query, body, *match.groups())
+                except JQLError as e:
+                    return 400, {"errorMessages": [str(e)]}, {}
+        return 404, {"errorMessages": [f"No fake route for {method} {path}"]}, {}
+
+    def _touch(self, issue):
+        issue["fields"]["updated"] = jira_time(datetime.now(timezone.utc))
+        self._version += 1
+
+    def _matching(self, jql):
+        with self._lock:
+            cached = self._searches.get(jql)
+            if cached and cached[0] == self._version:
+                return cached[1]
+            test, order = compile_jql(jql)
+            found = list(filter(test, self.issues.values()))
+            for sort_key, reverse in reversed(order):  # stable, so the last sort leads
+                found.sort(key=sort_key, reverse=reverse)
+            keys = [it["key"] for it in found]
+            self._searches[jql] = (self._version, keys)
+            return keys
+
+    def _project_fields(self, issue, fields):
+        out = {"id": issue["id"], "key": issue["key"], "self": f"/rest/api/3/issue/{issue['id']}"}
+        if fields is None or "*all" in fields:
+            out["fields"] = issue["fields"]
+        else:
+            out["fields"] = {f: issue["fields"].get(f) for f in fields if f != "key"}
+        return out
+
+    def search(self, query, body):
+        keys = self._matching(query.get("jql", ""))
+        start = int(query.get("startAt", 0))
+        size = max(0, min(int(query.get("maxResults", 50)), MAX_PAGE))
+        fields = query["fields"].split(",") if query.get("fields") else None
+        with self._lock:
+            page = [self._project_fields(self.issues[k], fields) for k in keys[start:start + size] if k in self.issues]
+        return 200, {"startAt": start, "maxResults": size, "total": len(keys), "issues": page}, {}
+
+    def user_search(self, query, body):
+        q = (query.get("query") or "").lower()
+        return 200, [u for u in self.users.values() if q and (q in u["emailAddress"].lower() or q in u["displayName"].lower())], {}
+
+    def set_assignee(self, query, body, key):
+        with self._lock:
+            issue = self.issues.get(key)
+            if issue is None:
+                return 404, {"errorMessages": [f"Issue does not exist: {key}"]}, {}
+            account = (body or {}).get("accountId")
+            if account is not None and account not in self.users:
+                return 400, {"errorMessages": [f"User '{account}' does not exist."]}, {}
+            issue["fields"]["assignee"] = self.users.get(account)
+            self._touch(issue)
+        return 204, None, {}
+
+    def get_issue(self, query, body, key):
+        with self._lock:
+            issue = self.issues.get(key)
+            if issue is None:
+                return 404, {"errorMessages": [f"Issue does not exist: {key}"]}, {}
+            return 200, self._project_fields(issue, query["fields"].split(",") if query.get("fields") else None), {}
+
+    def create_issue(self, query, body, *_):
+        fields = (body or {}).get("fields") or {}
+        project = (fields.get("project") or {}).get("key") or self.project
+        now = jira_time(datetime.now(timezone.utc))
+        with self._lock:
+            n = max((int(k.rsplit("-", 1)[1]) for k in self.issues), default=0) + 1
+            issue = {
+                "id": str(10000 + n),
+                "key": f"{project}-{n}",
+                "fields": {
+                    "summary": fields.get("summary") or "",
+                    "description": fields.get("description"),
+                    "issuetype": fields.get("issuetype") or {"name": "Task"},
+                    "status": STATUSES["To Do"],
+                    "assignee": None,
+                    "priority": fields.get("priority") or {"name": "Medium"},
+                    "created": now,
+                    "updated": now,
+                    "resolutiondate": None,
+                    "duedate": fields.get("duedate"),
+                    "labels": fields.get("labels") or [],
+                    jira_http.SPRINT_FIELD: None,
+                },
+            }
+            self.issues[issue["key"]] = issue
+            self._version += 1
+        return 201, {"id": issue["id"], "key": issue["key"], "self": f"/rest/api/3/issue/{issue['id']}"}, {}
+
+    def server_info(self, query, body):
+        return 200, {"baseUrl": "", "version": "1001.0.0-SNAPSHOT", "versionNumbers": [1001, 0, 0],
+                     "deploymentType": "Cloud", "serverTitle": "Fake Jira"}, {}
+
+    def board_sprints(self, query, body, board_id):
+        with self._lock:
+            sprints = [s for s in self.sprints.values() if s["boardId"] == int(board_id)]
+        start = int(query.get("startAt", 0))
+        size = int(query.get("maxResults", 50))
+        page = sprints[start:start + size]
+        return 200, {"startAt": start, "maxResults": size, "isLast": start + size >= len(sprints), "values": page}, {}
+
+    def create_sprint(self, query, body):
+        body = body or {}
+        with self._lock:
+            sprint = {"id": max(self.sprints, default=0) + 1, "name": body.get("name") or "Sprint",
+                      "state": "future", "boardId": int(body.get("originBoardId") or BOARD_ID),
+                      "startDate": body.get("startDate"), "endDate": body.get("endDate")}
+            self.sprints[sprint["id"]] = sprint
+        return 201, sprint, {}
+
+    def move_to_sprint(self, query, body, sprint_id):
+        keys = (body or {}).get("issues") or []
+        if len(keys) > MAX_SPRINT_MOVE:
+            return 400, {"errorMessages": [f"At most {MAX_SPRINT_MOVE} issues can be moved at once."]}, {}
+        with self._lock:
+            sprint = self.sprints.get(int(sprint_id))
+            if sprint is None:
+                return 404, {"errorMessages": [f"Sprint does not exist: {sprint_id}"]}, {}
+            for key in keys:
+                issue = self.issues.get(key)
+                if issue:
+                    issue["fields"][jira_http.SPRINT_FIELD] = [dict(sprint)]
+                    self._touch(issue)
+        return 204, None, {}
+
+
+def exchange_key(method, path, query, body):
+    return json.dumps([method, path, sorted(query.items()), body], sort_keys=True)
+
+
+class Replay:
+    """Answers from a --record file; repeated identical requests get the recorded responses in turn."""
+
+    def __init__(self, path):
+        self.responses = defaultdict(deque)
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                x = json.loads(line)
+                self.responses[exchange_key(x["method"], x["path"], x["query"], x["body"])].append(x)
+        self._lock = threading.Lock()
+
+    def handle(self, method, path, query, body):
+        with self._lock:
+            recorded = self.responses.get(exchange_key(method, path, query, body))
+            if not recorded:
+                return 404, {"errorMessages": [f"Not in recording: {method} {path}"]}, {}
+            x = recorded[0]
+            if len(recorded) > 1:
+                recorded.popleft()
+        return x["status"], x["payload"], x.get("headers") or {}
+
+
+class Upstream:
+    """Forwards to a real Jira with the configured credentials."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.session = jira_http._build_session()
+
+    def handle(self, method, path, query, body):
+        r = self.session.request(method, self.base_url + path, params=query, json=body, timeout=jira_http.TIMEOUT)
+        payload = r.json() if r.content else None
+        headers = {"Retry-After": r.headers["Retry-After"]} if "Retry-After" in r.headers else {}
+        return r.status_code, payload, headers
+
+
+def make_handler(app, record_path=None):
+    record_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so pooled clients reuse connections
+
+        def _serve(self, method):
+            url = urlsplit(self.path)
+            query = dict(parse_qsl(url.query))
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            body = json.loads(raw) if raw else None
+            status, payload, headers = app.handle(method, url.path, query, body)
+            if record_path:
+                line = json.dumps({"method": method, "path": url.path, "query": query, "body": body,
+                                   "status": status, "payload": payload, "headers": headers})
+                with record_lock, open(record_path, "a", encoding="utf-8") as fh:
+                    fh.write(line + "\n")
+            data = json.dumps(payload).encode() if payload is not None else b""
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if data:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self._serve("POST")
+
+        def do_PUT(self):
+            self._serve("PUT")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(app, port=8080, host="127.0.0.1", record_path=None, background=False):
+    """Run the fake; with background=True it runs on a daemon thread and the server is returned."""
+    server = ThreadingHTTPServer((host, port), make_handler(app, record_path))
+    server.daemon_threads = True
+    server.app = app
+    server.url = f"http://{host}:{server.server_port}"
+    if background:
+        threading.Thread(target=server.serve_forever, name="fake-jira", daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def bench(n_issues=50000, latency=0.0, throttle=0.0):
+    """
+    Fetch / assign / rebalance throughput against an in-process fake; prints a small table.
+    Assigning and rebalancing go through JiraAutoAssigner.run and rebalance_sprint, team
+    detection (the embedding model) included, with writes unthrottled.
+    Returns how many moves a dry-run rebalance still plans afterwards (0 when the first converged).
+    """
+    import jira_assign
+    import jira_sprint_rebalance
+    import user_directory
+    from bulk_assign import summarize
+
+    t = time.perf_counter()
+    app = FakeJira(generate_project(n_issues), latency=latency, throttle=throttle)
+    server = serve(app, port=0, background=True)
+    jira_http.configure(base_url=server.url, email="bench@example.com", api_token="x")
+    jira_assign.PROJECT_KEY = jira_sprint_rebalance.PROJECT_KEY = PROJECT
+    print(f"Seeded {n_issues:,} issues in {time.perf_counter() - t:.1f}s at {server.url}\n")
+    rows = []
+
+    t = time.perf_counter()
+    fetched = sum(1 for _ in jira_http.iter_issues(f'project = "{PROJECT}"', fields="nlq"))
+    rows.append(("fetch (nlq fields)", fetched, time.perf_counter() - t))
+
+    # an in-memory directory, so the fake's account ids never reach the on-disk cache
+    directory = user_directory._directory = user_directory.UserDirectory(path=None)
+    t = time.perf_counter()
+    ids = directory.prefetch_team_members()
+    rows.append(("resolve team members", len(ids), time.perf_counter() - t))
+
+    quiet = io.StringIO()  # the entry points print a line per issue
+    t = time.perf_counter()
+    with redirect_stdout(quiet):
+        report = jira_assign.JiraAutoAssigner().run(rate=1e9)
+    rows.append((f"auto-assign ({summarize(report)})", sum(map(len, report.values())), time.perf_counter() - t))
+
+    active = next(s for s in app.sprints.values() if s["state"] == "active")
+    in_sprint = sum(1 for it in app.issues.values() if it["fields"]["status"]["name"] != "Done"
+                    and any(s["id"] == active["id"] for s in it["fields"].get(jira_http.SPRINT_FIELD) or []))
+    t = time.perf_counter()
+    with redirect_stdout(quiet):
+        report = jira_sprint_rebalance.rebalance_sprint(active["id"], rate=1e9)
+    rows.append((f"rebalance sprint ({len(report['plan'])} moves)", in_sprint, time.perf_counter() - t))
+    with redirect_stdout(quiet):
+        again = jira_sprint_rebalance.rebalance_sprint(active["id"], dry_run=True)["plan"]  # a balanced sprint plans nothing
+
+    server.shutdown()
+    print(f"{'step':<48}{'issues':>9}{'seconds':>10}{'issues/s':>12}")
+    for name, n, seconds in rows:
+        print(f"{name:<48}{n:>9,}{seconds:>10.2f}{n / seconds if seconds else 0:>12,.0f}")
+    print(f"\nRequests served: {sum(app.requests.values()):,}")
+    if again:
+        print(f"Re-planning the rebalanced sprint moved {len(again)} more issue(s), e.g. {again[0]['key']} ({again[0]['team']})")
+    return len(again)
+
+
+def _option(args, name, default, cast=str):
+    if name in args:
+        return cast(args[args.index(name) + 1])
+    return default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    command = args[0] if args and not args[0].startswith("--") else "serve"
+    latency = _option(args, "--latency", 0.0, float)
+    throttle = _option(args, "--throttle", 0.0, float)
+    if command == "bench":
+        sys.exit(1 if bench(_option(args, "--issues", 50000, int), latency, throttle) else 0)
+    else:
+        replay = _option(args, "--replay", None)
+        upstream = _option(args, "--upstream", None)
+        if replay:
+            app = Replay(replay)
+        elif upstream:
+            app = Upstream(upstream)
+        else:
+            app = FakeJira(generate_project(_option(args, "--issues", 5000, int)), latency=latency, throttle=throttle)
+        port = _option(args, "--port", 8080, int)
+        print(f"🧪 Fake Jira on http://127.0.0.1:{port} (project {PROJECT}, board {BOARD_ID}). Ctrl+C to stop.")
+        serve(app, port=port, record_path=_option(args, "--record", None))
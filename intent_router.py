@@ -0,0 +1,55 @@
+import re
+
+
+MAX_QUERY_CHARS = 500  # longer input is refused rather than handed to backtracking patterns
+
+
+class IntentRouter:
+    """
+    First-match routing over an ordered list of (pattern, keyword) intents.
+
+    Same result as trying `pattern.search(query)` for each intent in order, but a pattern
+    is only run when its keyword occurs in the query under re.I, so a question costs a few
+    keyword checks plus the searches of the one or two intents it could be. The keyword
+    must occur literally (case aside) in every match of its pattern. For an ASCII query and
+    ASCII keywords that check is a substring test on the lower-cased query; anything else
+    (e.g. dotless 'ı', which re.I matches to 'i' but casefold() leaves alone) goes through
+    a compiled re.I search for the keyword. Queries are capped at `max_chars`, which bounds
+    what any `.*` in a pattern can backtrack over.
+    """
+
+    def __init__(self, intents, max_chars=MAX_QUERY_CHARS):
+        self.intents = [(pattern, keyword.lower()) for pattern, keyword in intents]
+        self.gates = [re.compile(re.escape(keyword), re.I) for _, keyword in intents]
+        self.ascii = all(keyword.isascii() for _, keyword in intents)
+        self.max_chars = max_chars
+
+    def _gated(self, query):
+        """Whether each intent's keyword occurs in the query, matched as re.I would."""
+        if self.ascii and query.isascii():
+            lowered = query.lower()
+            return [keyword in lowered for _, keyword in self.intents]
+        return [gate.search(query) is not None for gate in self.gates]
+
+    def candidates(self, query):
+        return [i for i, hit in enumerate(self._gated(query)) if hit]
+
+    def route(self, query):
+        """(intent index, match) for the first intent that matches, or (None, None)."""
+        if len(query) > self.max_chars:
+            raise ValueError(f"query longer than {self.max_chars} characters")
+        for i, hit in enumerate(self._gated(query)):
+            if hit:
+                match = self.intents[i][0].search(query)
+                if match:
+                    return i, match
+        return None, None
+
+
+def route_sequential(intents, query):
+    """The reference behaviour: first intent whose pattern.search matches."""
+    for i, (pattern, _) in enumerate(intents):
+        match = pattern.search(query)
+        if match:
+            return i, match
+    return None, None
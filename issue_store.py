@@ -0,0 +1,120 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+
+STORE_PATH = os.getenv("ISSUE_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".issue_store.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    project TEXT NOT NULL,
+    key TEXT NOT NULL,
+    created TEXT,
+    row TEXT NOT NULL,
+    PRIMARY KEY (project, key)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    project TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (project, name)
+);
+"""
+
+DATETIME_FIELDS = ("created", "updated", "resolved", "due")
+
+
+def encode_row(row) -> str:
+    return json.dumps({k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()})
+
+
+def created_value(row):
+    created = row.get("created")
+    # stored as UTC so the ORDER BY on this text column is chronological
+    return created.astimezone(timezone.utc).isoformat() if isinstance(created, datetime) else created
+
+
+def decode_row(text):
+    row = json.loads(text)
+    for field in DATETIME_FIELDS:
+        if row.get(field):
+            row[field] = datetime.fromisoformat(row[field])
+    return row
+
+
+class IssueStore:
+    """
+    Persistent store of normalized issue rows (jira_nlq.normalize_issue output, team included),
+    one SQLite table per install with rows scoped by project, plus per-project sync metadata
+    such as the last sync watermark.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def rows(self, project):
+        """All rows for a project, newest first, ties in Jira's key order (FAKE-9 before FAKE-10)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT row FROM issues WHERE project = ? ORDER BY created DESC, length(key), key", (project,)
+            )
+            return [decode_row(text) for (text,) in cur]
+
+    def get(self, project, key):
+        with self._lock:
+            found = self._conn.execute("SELECT row FROM issues WHERE project = ? AND key = ?", (project, key)).fetchone()
+        return decode_row(found[0]) if found else None
+
+    def keys(self, project):
+        with self._lock:
+            return {key for (key,) in self._conn.execute("SELECT key FROM issues WHERE project = ?", (project,))}
+
+    def count(self, project) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM issues WHERE project = ?", (project,)).fetchone()[0]
+
+    def upsert(self, project, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO issues (project, key, created, row) VALUES (?, ?, ?, ?)",
+                [(project, r["key"], created_value(r), encode_row(r)) for r in rows],
+            )
+
+    def delete(self, project, keys):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM issues WHERE project = ? AND key = ?", [(project, k) for k in keys])
+
+    def get_meta(self, project, name, default=None):
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT value FROM meta WHERE project = ? AND name = ?", (project, name)
+            ).fetchone()
+        return json.loads(found[0]) if found else default
+
+    def set_meta(self, project, name, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (project, name, value) VALUES (?, ?, ?)", (project, name, json.dumps(value))
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> IssueStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = IssueStore()
+        return _store
@@ -1,10 +1,9 @@
 from dotenv import load_dotenv
 import os
-import requests
-from requests.auth import HTTPBasicAuth
 from groq import Groq
-from datetime import datetime
 from teams import TEAM_MEMBERS   
+from issue_store import get_store
+from jira_nlq import sync_store
 
 load_dotenv()
 JIRA_URL = os.getenv("JIRA_URL")
@@ -15,39 +14,6 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 
 
-def parse_adf(adf):
-    
-    if isinstance(adf, str):
-        return adf
-    if not adf or "content" not in adf:
-        return ""
-    text_parts = []
-    for block in adf.get("content", []):
-        if block.get("type") == "paragraph":
-            para_text = []
-            for node in block.get("content", []):
-                if node.get("type") == "text":
-                    para_text.append(node.get("text", ""))
-            text_parts.append(" ".join(para_text))
-    return "\n".join(text_parts).strip()
-
-
-def get_sprint(fields):
-    
-    sprint_field = fields.get("customfield_10020")
-    if sprint_field and isinstance(sprint_field, list) and sprint_field:
-        sprint_info = sprint_field[0]
-        sprint_name = None
-        if isinstance(sprint_info, str):
-            for part in sprint_info.split(","):
-                if part.strip().startswith("name="):
-                    sprint_name = part.split("=", 1)[1]
-        elif isinstance(sprint_info, dict):
-            sprint_name = sprint_info.get("name")
-        return sprint_name
-    return None
-
-
 def get_team(assignee_name_or_email: str) -> str:
    
     if not assignee_name_or_email:
@@ -57,56 +23,24 @@ def get_team(assignee_name_or_email: str) -> str:
             return team
     return "Other"
 
-def fetch_all_tickets():
-    
-    search_url = f"{JIRA_URL}/rest/api/3/search"
-    jql = f"project={PROJECT_KEY} ORDER BY created DESC"
-    auth = HTTPBasicAuth(EMAIL, API_TOKEN)
-    headers = {"Accept": "application/json"}
-
-    start_at, max_results = 0, 100
-    tickets = []
-
-    while True:
-        r = requests.get(
-            search_url,
-            headers=headers,
-            auth=auth,
-            params={"jql": jql, "startAt": start_at, "maxResults": max_results}
-        )
-        r.raise_for_status()
-        data = r.json()
-
-        total = data.get("total", 0)
-        issues = data.get("issues", [])
-        print(f"Jira reports total issues: {total}")
-        print(f"Fetched this page: {len(issues)} (startAt={start_at})")
-
-        for issue in issues:
-            fields = issue["fields"]
-            created = datetime.strptime(fields["created"], "%Y-%m-%dT%H:%M:%S.%f%z")
-
-            assignee_name = (
-                fields.get("assignee", {}).get("displayName")
-                if fields.get("assignee") else "Unassigned"
-            )
-
-            tickets.append({
-                "key": issue["key"],
-                "status": fields["status"]["name"],
-                "assignee": assignee_name,
-                "team": get_team(assignee_name),
-                "sprint": get_sprint(fields),
-                "created": created,   
-                "summary": fields.get("summary", ""),
-                "description": parse_adf(fields.get("description", "")),
-            })
-
-        
-        if start_at + max_results >= total:
-            break
-        start_at += max_results
+def ticket_from_row(row):
+    assignee_name = row.get("assigneeName") or "Unassigned"
+    return {
+        "key": row["key"],
+        "status": row["status"],
+        "assignee": assignee_name,
+        "team": get_team(assignee_name),
+        "sprint": row["sprint"],
+        "created": row["created"],
+        "summary": row["summary"],
+        "description": row["description"],
+    }
 
+def fetch_all_tickets():
+    """Tickets from the local issue store, after pulling only what changed since the last sync."""
+    changed = sync_store()
+    tickets = [ticket_from_row(r) for r in get_store().rows(PROJECT_KEY)]
+    print(f"Synced {changed} changed issue(s); {len(tickets)} issue(s) in the local store")
     return tickets
 
 
@@ -1,118 +1,136 @@
+import heapq
 import os
 from collections import defaultdict
 from dotenv import load_dotenv
-from requests.auth import HTTPBasicAuth
-import requests
-from teams import TEAM_SKILLS, TEAM_MEMBERS
-from embeddings import embed_text, cosine_sim, extract_text_from_jira_description 
+import jira_http
+from teams import TEAM_MEMBERS
+from adf import issue_description_text
+from embeddings import TEXT_MAX_CHARS, detect_teams, warm_up
+from user_directory import get_directory
+from bulk_assign import WRITE_RATE, assign_many, summarize
 
 load_dotenv()
-JIRA_URL = os.getenv("JIRA_URL").rstrip("/")
+JIRA_URL = os.getenv("JIRA_URL", "").rstrip("/")
 PROJECT_KEY = os.getenv("PROJECT_KEY")
 EMAIL = os.getenv("EMAIL")
 API_TOKEN = os.getenv("API_TOKEN")
 
-auth = HTTPBasicAuth(EMAIL, API_TOKEN)
-headers = {"Accept": "application/json", "Content-Type": "application/json"}
+ASSIGN_WEIGHT = os.getenv("ASSIGN_WEIGHT", "count")  # count | points | priority
+PRIORITY_WEIGHTS = {"Highest": 5, "High": 4, "Medium": 3, "Low": 2, "Lowest": 1}
+
+
+def issue_weight(issue, mode=ASSIGN_WEIGHT):
+    """How much an issue adds to its assignee's load: 1, its story points, or its priority."""
+    fields = issue.get("fields", {})
+    if mode == "points":
+        points = fields.get(jira_http.STORY_POINTS_FIELD)
+        return float(points) if isinstance(points, (int, float)) and points > 0 else 1.0
+    if mode == "priority":
+        return PRIORITY_WEIGHTS.get((fields.get("priority") or {}).get("name"), PRIORITY_WEIGHTS["Medium"])
+    return 1
+
+
+def plan_assignments(items, team_members=TEAM_MEMBERS, load=None):
+    """
+    Least-loaded assignment for a whole batch.
+
+    `items` are (issue key, team, weight) tuples and `load` the members' current open load.
+    Heavier issues are placed first (ties on key), each on the least-loaded member of its
+    team, with ties on email, so the result is deterministic. Every team keeps a heap of
+    (load, email); because members can sit in several teams, entries go stale when another
+    team's issue lands on them and are refreshed lazily when they surface.
+
+    Returns ({issue key: email}, final load). Issues of teams without members are left out.
+    """
+    load = defaultdict(float, load or {})
+    heaps = {}
+    assignments = {}
+    for key, team, weight in sorted(items, key=lambda item: (-item[2], item[0])):
+        if team not in heaps:
+            members = team_members.get(team, team_members.get("General", []))
+            heaps[team] = [(load[m], m) for m in members]
+            heapq.heapify(heaps[team])
+        heap = heaps[team]
+        if not heap:
+            continue
+        while heap[0][0] != load[heap[0][1]]:
+            heapq.heapreplace(heap, (load[heap[0][1]], heap[0][1]))
+        member = heap[0][1]
+        assignments[key] = member
+        load[member] += weight
+        heapq.heapreplace(heap, (load[member], member))
+    return assignments, load
 
 class JiraAutoAssigner:
     def __init__(self):
-        self.team_embeddings = {team: embed_text(skills) for team, skills in TEAM_SKILLS.items()}
         self.assignments = {}  # issue_key -> assigned member email
         self.member_load = defaultdict(int)  # email -> count
 
-    def get_issues(self, jql):
-        url = f"{JIRA_URL}/rest/api/3/search"
-        params = {"jql": jql, "maxResults": 100}
-        r = requests.get(url, headers=headers, params=params, auth=auth)
-        r.raise_for_status()
-        return r.json().get("issues", [])
+    def get_issues(self, jql, fields="assign"):
+        """Lazily streams every matching issue (no page cap)."""
+        return jira_http.iter_issues(jql, fields=fields)
 
-    def count_current_load(self):
-        """Count open issues per member to ensure fair distribution"""
+    def count_current_load(self, weight=ASSIGN_WEIGHT):
+        """Open load per member over every open issue, weighted like the issues being assigned"""
         load_count = defaultdict(int)
-        jql = f'project = "{PROJECT_KEY}" AND statusCategory != Done'
-        issues = self.get_issues(jql)
-        for issue in issues:
+        jql = f'project = "{PROJECT_KEY}" AND statusCategory != Done AND assignee IS NOT EMPTY'
+        for issue in self.get_issues(jql, fields="load-count"):
             assignee = issue["fields"].get("assignee")
             if assignee and assignee.get("emailAddress"):
-                load_count[assignee["emailAddress"]] += 1
+                load_count[assignee["emailAddress"]] += issue_weight(issue, weight)
         self.member_load = load_count
 
-    def detect_team(self, summary, description):
-        issue_text = f"{summary} {description}".strip()
-        issue_emb = embed_text(issue_text)
-        best_team, best_score = None, -1
-        for team, emb in self.team_embeddings.items():
-            score = cosine_sim(issue_emb, emb)
-            if score > best_score:
-                best_score = score
-                best_team = team
-        return best_team if best_score >= 0.3 else "General"
-
-    def assign_issue(self, issue):
-        fields = issue.get("fields", {})
-        if fields.get("assignee"):  # Skip if already assigned
-            return None
+    def detect_teams(self, texts):
+        """Classify many (summary, description) pairs in one batched embedding pass."""
+        issue_texts = [f"{summary} {description}".strip() for summary, description in texts]
+        return detect_teams(issue_texts)
 
+    def summary_and_description(self, issue):
+        fields = issue.get("fields", {})
         summary = fields.get("summary") or ""
         description_field = fields.get("description")
         description = (
-            extract_text_from_jira_description(description_field)
+            issue_description_text(issue.get("key"), fields.get("updated"), description_field, TEXT_MAX_CHARS)
             if isinstance(description_field, dict)
             else description_field or ""
         )
+        return summary, description
 
-        team = self.detect_team(summary, description)
-        members = TEAM_MEMBERS.get(team, TEAM_MEMBERS["General"])
-        if not members:
-            print(f"⚠ No members for team {team} — skipping {issue['key']}")
-            return None
-
-    
-        chosen_member = min(members, key=lambda m: self.member_load.get(m, 0))
-        self.assignments[issue["key"]] = chosen_member
-        self.member_load[chosen_member] += 1
-        print(f" {issue['key']}: Assigned to '{chosen_member}' (Team: {team})")
-
-    def get_account_id(self, email):
-        url = f"{JIRA_URL}/rest/api/3/user/search"
-        params = {"query": email}
-        r = requests.get(url, headers=headers, params=params, auth=auth)
-        r.raise_for_status()
-        users = r.json()
-        if not users:
-            raise ValueError(f"No account found for email: {email}")
-        return users[0]["accountId"]
-
-    def update_jira_assignment(self, issue_key, email):
-        url = f"{JIRA_URL}/rest/api/3/issue/{issue_key}/assignee"
-        payload = {"accountId": self.get_account_id(email)}
-        r = requests.put(url, json=payload, headers=headers, auth=auth)
-        if r.status_code == 204:
-            print(f"   ↳ Jira updated for {issue_key}")
-        else:
-            print(f" Failed to update {issue_key}: {r.text}")
-
-    def run(self):
+    def run(self, progress=None, rate=WRITE_RATE):
+        """Assign every open unassigned issue, writing at most `rate` per second; returns the bulk_assign report."""
+        warm_up()
         print("Fetching unassigned issues...")
         jql = f'project = "{PROJECT_KEY}" AND assignee IS EMPTY AND statusCategory != Done'
-        unassigned = self.get_issues(jql)
+        unassigned = list(self.get_issues(jql))
         if not unassigned:
             print(" No unassigned issues found.")
-            return
+            return {"succeeded": [], "failed": [], "skipped": []}
 
         self.count_current_load()
         print(f"Found {len(unassigned)} unassigned issues. Assigning...")
 
-        for issue in unassigned:
-            self.assign_issue(issue)
+        pending = [issue for issue in unassigned if not issue.get("fields", {}).get("assignee")]
+        teams = self.detect_teams([self.summary_and_description(issue) for issue in pending])
+        assignments, self.member_load = plan_assignments(
+            [(issue["key"], team, issue_weight(issue)) for issue, team in zip(pending, teams)], load=self.member_load
+        )
+        for issue, team in zip(pending, teams):
+            if issue["key"] in assignments:
+                print(f" {issue['key']}: Assigned to '{assignments[issue['key']]}' (Team: {team})")
+            else:
+                print(f"⚠ No members for team {team} — skipping {issue['key']}")
+        self.assignments.update(assignments)
 
         print("\n Updating Jira with assignments...")
-        for key, email in self.assignments.items():
-            self.update_jira_assignment(key, email)
+        account_ids = get_directory().resolve(self.assignments.values())  # one concurrent lookup per member, cached across runs
+        report = assign_many(
+            [(key, account_ids.get(email)) for key, email in self.assignments.items()], progress=progress, rate=rate
+        )
+        for failure in report["failed"]:
+            print(f" Failed to update {failure['key']}: {failure['error']}")
 
-        print("\n Assignment complete.")
+        print(f"\n Assignment complete: {summarize(report)}.")
+        return report
 
 if __name__ == "__main__":
     JiraAutoAssigner().run()
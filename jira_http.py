@@ -0,0 +1,180 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+
+load_dotenv()
+JIRA_URL = os.getenv("JIRA_URL", "").rstrip("/")
+EMAIL = os.getenv("EMAIL")
+API_TOKEN = os.getenv("API_TOKEN")
+
+POOL_SIZE = int(os.getenv("JIRA_POOL_SIZE", 16))
+MAX_RETRIES = int(os.getenv("JIRA_MAX_RETRIES", 5))
+BACKOFF = float(os.getenv("JIRA_BACKOFF", 0.5))  # seconds; doubles per retry unless Retry-After says otherwise
+TIMEOUT = float(os.getenv("JIRA_TIMEOUT", 30))
+SEARCH_PATH = "/rest/api/3/search"
+SEARCH_PAGE_SIZE = 100
+SEARCH_WORKERS = int(os.getenv("JIRA_SEARCH_WORKERS", 4))
+
+SPRINT_FIELD = os.getenv("JIRA_SPRINT_FIELD", "customfield_10020")
+STORY_POINTS_FIELD = os.getenv("JIRA_STORY_POINTS_FIELD", "customfield_10016")
+
+# Named `fields=` projections for search requests; without one Jira returns every field,
+# custom fields included, on every issue. The issue key is always returned.
+FIELD_PROFILES = {
+    "nlq": ["summary", "description", "status", "assignee", "created", "updated", "resolutiondate",
+            "priority", "duedate", SPRINT_FIELD],
+    "analyzer": ["summary", "description", "status", "assignee", "created", "updated", SPRINT_FIELD],
+    "assign": ["summary", "description", "assignee", "updated", "priority", STORY_POINTS_FIELD],
+    "rebalance": ["summary", "description", "assignee", "status", "updated"],
+    "sprint-board": ["summary", "description", "issuetype", "assignee", "status"],
+    "backlog": ["summary", "description", "issuetype", "assignee"],
+    "load-count": ["assignee", "priority", STORY_POINTS_FIELD],
+    "picker": ["summary"],
+    "keys": ["key"],
+}
+
+HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def configure(base_url=None, email=None, api_token=None):
+    """Point the shared client at another Jira (e.g. a local stand-in) and drop the old session."""
+    global JIRA_URL, EMAIL, API_TOKEN, _session
+    with _session_lock:
+        if base_url is not None:
+            JIRA_URL = base_url.rstrip("/")
+        if email is not None:
+            EMAIL = email
+        if api_token is not None:
+            API_TOKEN = api_token
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _build_session():
+    # POST is left out of the retried methods: creating an issue twice is worse than failing once.
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "PUT", "DELETE", "HEAD", "OPTIONS"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    session.auth = HTTPBasicAuth(EMAIL, API_TOKEN)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session; requests.Session is safe to share across threads for this use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def request(method, path, **kwargs) -> requests.Response:
+    """Send a request relative to JIRA_URL; 429/5xx are retried with backoff honouring Retry-After."""
+    kwargs.setdefault("timeout", TIMEOUT)
+    return get_session().request(method, f"{JIRA_URL}{path}", **kwargs)
+
+
+def get_json(path, params=None):
+    r = request("GET", path, params=params)
+    r.raise_for_status()
+    return r.json()
+
+
+def put(path, payload) -> requests.Response:
+    return request("PUT", path, json=payload)
+
+
+def post(path, payload) -> requests.Response:
+    return request("POST", path, json=payload)
+
+
+def fields_param(fields) -> str:
+    """A profile name from FIELD_PROFILES, or an explicit list of field ids, as a fields= value."""
+    if isinstance(fields, str):
+        fields = FIELD_PROFILES[fields]
+    return ",".join(fields)
+
+
+def search_page(jql, start_at=0, max_results=SEARCH_PAGE_SIZE, params=None, path=SEARCH_PATH):
+    query = {"jql": jql, "startAt": start_at, "maxResults": max_results}
+    query.update(params or {})
+    return get_json(path, params=query)
+
+
+def search_pages(jql, max_results=None, page_size=SEARCH_PAGE_SIZE, workers=SEARCH_WORKERS, params=None,
+                 path=SEARCH_PATH, fields=None):
+    """
+    Yield search result pages in startAt order, projected to `fields` (profile or list) if given.
+
+    The first request reads `total`; the remaining pages are fetched on a thread pool with
+    at most `workers` requests in flight. A failed page re-raises in the consumer and the
+    pages not yet started are cancelled, as they are if the consumer stops early.
+    """
+    if fields is not None:
+        params = dict(params or {}, fields=fields_param(fields))
+    limit = max_results
+    first = search_page(jql, 0, page_size if limit is None else min(page_size, limit), params, path)
+    yield first
+    total = first.get("total", 0) if limit is None else min(first.get("total", 0), limit)
+    step = first.get("maxResults") or page_size  # Jira may cap the page size below what we asked for
+    starts = iter(range(len(first.get("issues", [])), total, step))
+    if not first.get("issues"):
+        return
+    workers = max(1, workers)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jira-search")
+    in_flight = deque()
+
+    def submit_next():
+        start = next(starts, None)
+        if start is not None:
+            in_flight.append(executor.submit(search_page, jql, start, min(step, total - start), params, path))
+
+    try:
+        for _ in range(workers):
+            submit_next()
+        while in_flight:
+            page = in_flight.popleft().result()
+            submit_next()
+            yield page
+            if not page.get("issues"):
+                return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_issues(jql, fields=None, max_results=None, **kwargs):
+    """
+    Every issue matching jql, one at a time. Pages are requested lazily (a few ahead), so
+    memory stays constant however large the result set; aggregate callers can consume
+    this without building a list.
+    """
+    for page in search_pages(jql, max_results=max_results, fields=fields, **kwargs):
+        yield from page.get("issues", [])
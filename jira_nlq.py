@@ -1,15 +1,24 @@
 import os
 import re
 import math
+import queue
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from collections import defaultdict, Counter
+from collections import Counter
 
-import requests
-from requests.auth import HTTPBasicAuth
+import numpy as np
 from dotenv import load_dotenv
 
-from teams import TEAM_SKILLS, TEAM_MEMBERS
-from embeddings import embed_text, cosine_sim, extract_text_from_jira_description
+import jira_http
+import teams
+from teams import TEAM_MEMBERS
+from adf import issue_description_text
+from embeddings import classify_vectors, embed_texts, team_skills_hash, warm_up
+from issue_store import get_store
+from nlq_dataset import NLQDataset, aggregates, columns
+from intent_router import IntentRouter, MAX_QUERY_CHARS
+from answer_cache import AnswerCache
 
 
 load_dotenv()
@@ -18,36 +27,17 @@ PROJECT_KEY = os.getenv("PROJECT_KEY")
 EMAIL = os.getenv("EMAIL")
 API_TOKEN = os.getenv("API_TOKEN")
 
-if not all([JIRA_URL, PROJECT_KEY, EMAIL, API_TOKEN]):
-    raise SystemExit(" Missing env vars. Ensure JIRA_URL, PROJECT_KEY, EMAIL, API_TOKEN are in your .env")
-
-AUTH = HTTPBasicAuth(EMAIL, API_TOKEN)
-HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
-
-
-def parse_adf_to_text(adf):
-    if not adf:
-        return ""
-    if isinstance(adf, str):
-        return adf
-    out = []
-    for block in adf.get("content", []):
-        t = block.get("type")
-        if t == "paragraph":
-            segs = [node.get("text", "") for node in block.get("content", []) or [] if node.get("type") == "text"]
-            if segs: out.append(" ".join(segs))
-        elif t in ("bulletList", "orderedList"):
-            for li in block.get("content", []) or []:
-                for inner in li.get("content", []) or []:
-                    line = [node.get("text", "") for node in inner.get("content", []) or [] if node.get("type") == "text"]
-                    if line: out.append("- " + " ".join(line))
-        elif t == "codeBlock":
-            code_txt = [node.get("text", "") for node in block.get("content", []) or [] if node.get("type") == "text"]
-            if code_txt: out.append("```" + "\n".join(code_txt) + "```")
-    return "\n".join(x for x in out if x).strip()
+DESCRIPTION_MAX_CHARS = 8000  # stored rows also feed the Analyzer's LLM prompt; embedding truncates further
+EMBED_BATCH_SIZE = 256  # rows embedded (and stored) per pipeline micro-batch
+ANSWER_CACHE_SIZE = int(os.getenv("NLQ_CACHE_SIZE", 256))  # answers kept; 0 disables the cache
+ANSWER_CACHE_BUCKET = int(os.getenv("NLQ_CACHE_BUCKET_SECONDS", 60))  # lifetime of time-relative answers
+PIPELINE_QUEUE_PAGES = 4  # normalized pages buffered between fetch and embed
+SYNC_OVERLAP_MINUTES = 5  # re-read a little before the watermark to cover clock skew
+RECONCILE_INTERVAL = float(os.getenv("ISSUE_STORE_RECONCILE_HOURS", 6)) * 3600
+
 
 def parse_sprint_field(fields):
-    sf = fields.get("customfield_10020")
+    sf = fields.get(jira_http.SPRINT_FIELD)
     if not sf or not isinstance(sf, list) or not sf: return (None, None)
     spr = sf[0]
     name, state = None, None
@@ -71,37 +61,10 @@ def parse_dt(s):
 
 
 
-def fetch_all_issues(jql, max_results=1000):
-    url = f"{JIRA_URL}/rest/api/3/search"
-    start_at = 0
-    issues = []
-    while start_at < max_results:
-        r = requests.get(
-            url, headers=HEADERS, auth=AUTH,
-            params={"jql": jql, "maxResults": min(100, max_results-start_at), "startAt": start_at}
-        )
-        r.raise_for_status()
-        data = r.json()
-        batch = data.get("issues", [])
-        issues.extend(batch)
-        if start_at + len(batch) >= data.get("total", 0) or not batch: break
-        start_at += len(batch)
-    return issues
-
-def build_team_embeddings():
-    return {team: embed_text(sk) for team, sk in TEAM_SKILLS.items()}
-
-def detect_team(summary, description, team_embeds):
-    text = f"{summary or ''}\n{description or ''}".strip()
-    if not text: return "General"
-    emb = embed_text(text)
-    best_team, best_score = "General", -1.0
-    for team, t_emb in team_embeds.items():
-        score = cosine_sim(emb, t_emb)
-        if score > best_score: best_team, best_score = team, score
-    return best_team if best_score >= 0.30 else "General"
-
-def normalize_issue(issue, team_embeds):
+def issue_text(summary, description):
+    return f"{summary or ''}\n{description or ''}".strip()
+
+def normalize_issue(issue):
     fields = issue.get("fields", {})
     key = issue.get("key")
     status_name = (fields.get("status") or {}).get("name")
@@ -111,14 +74,13 @@ def normalize_issue(issue, team_embeds):
     assignee_email = assignee.get("emailAddress")
     summary = fields.get("summary") or ""
     description = fields.get("description")
-    desc_txt = parse_adf_to_text(description) if isinstance(description, dict) else (description or "")
+    desc_txt = issue_description_text(key, fields.get("updated"), description, DESCRIPTION_MAX_CHARS) if isinstance(description, dict) else (description or "")
     created = parse_dt(fields.get("created"))
     updated = parse_dt(fields.get("updated"))
     resolved = parse_dt(fields.get("resolutiondate"))
     sprint_name, sprint_state = parse_sprint_field(fields)
     priority = (fields.get("priority") or {}).get("name")
     duedate = parse_dt(fields.get("duedate"))
-    team = detect_team(summary, desc_txt, team_embeds)
     return {
         "key": key,
         "summary": summary,
@@ -134,163 +96,301 @@ def normalize_issue(issue, team_embeds):
         "due": duedate,
         "sprint": sprint_name,
         "sprintState": sprint_state,
-        "team": team,
+        "team": None,  # set by assign_teams
     }
 
+def assign_teams(rows):
+    """Embed rows in one batch and set their team; returns the vectors."""
+    texts = [issue_text(r["summary"], r["description"]) for r in rows]
+    vectors = embed_texts(texts)
+    for r, text, team in zip(rows, texts, classify_vectors(vectors)):
+        r["team"] = team if text else "General"
+    return vectors
+
+def iter_issue_rows(jql, max_results=None, fields="nlq", batch_size=EMBED_BATCH_SIZE, queue_pages=PIPELINE_QUEUE_PAGES):
+    """
+    Stream issues through fetch -> normalize -> embed and yield finished rows.
+
+    A producer thread pulls search pages (fetched concurrently by jira_http.search_pages)
+    and normalizes each into a bounded queue; this generator embeds what is queued in
+    micro-batches of up to batch_size. Network wait overlaps inference, and at most
+    queue_pages pages of rows are buffered, so raw JSON never piles up in memory.
+    Closing the generator early stops the producer.
+    """
+    pages = queue.Queue(maxsize=queue_pages)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in jira_http.search_pages(jql, max_results=max_results, fields=fields):
+                if not put([normalize_issue(it) for it in page.get("issues", [])]):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+
+    threading.Thread(target=produce, name="jira-nlq-pipeline", daemon=True).start()
+    pending = []
+    try:
+        while True:
+            item = pages.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            pending.extend(item)
+            # embed as soon as a batch is full or the producer has nothing else ready
+            while pending and (len(pending) >= batch_size or pages.empty()):
+                batch, pending = pending[:batch_size], pending[batch_size:]
+                assign_teams(batch)
+                yield from batch
+        if pending:
+            assign_teams(pending)
+            yield from pending
+    finally:
+        stop.set()
+
+def reconcile_deleted(store):
+    """Key-only pass over the project that drops stored issues Jira no longer has."""
+    remote = set()
+    for page in jira_http.search_pages(f'project = "{PROJECT_KEY}"', fields="keys"):
+        remote.update(it["key"] for it in page.get("issues", []))
+    gone = store.keys(PROJECT_KEY) - remote
+    store.delete(PROJECT_KEY, gone)
+    return gone
+
+def iter_sync(full=False):
+    """
+    Bring the local issue store up to date, yielding each changed row once it is stored.
+    Only issues updated since the last sync watermark are fetched and re-normalized;
+    deletions are picked up by a key-only reconciliation every RECONCILE_INTERVAL (or on
+    a full sync).
+    """
+    store = get_store()
+    started = time.time()
+    watermark = store.get_meta(PROJECT_KEY, "watermark")
+    skills_hash = team_skills_hash(teams.TEAM_SKILLS)
+    if watermark is not None and store.get_meta(PROJECT_KEY, "team_skills_hash") != skills_hash:
+        rows = store.rows(PROJECT_KEY)  # team config changed: re-label from cached vectors
+        if rows:
+            assign_teams(rows)
+            store.upsert(PROJECT_KEY, rows)
+    jql = f'project = "{PROJECT_KEY}"'
+    if watermark is not None and not full:
+        minutes = int((started - watermark) // 60) + SYNC_OVERLAP_MINUTES
+        jql += f" AND updated >= -{minutes}m"
+    seen = set()
+    batch = []
+    # newest first, ties by key: the order IssueStore.rows reads back, so a cold load lists the same rows as a warm one
+    for row in iter_issue_rows(jql + " ORDER BY created DESC, key ASC"):
+        seen.add(row["key"])
+        batch.append(row)
+        if len(batch) >= EMBED_BATCH_SIZE:
+            store.upsert(PROJECT_KEY, batch)
+            yield from batch
+            batch = []
+    store.upsert(PROJECT_KEY, batch)
+    yield from batch
+    reconciled = store.get_meta(PROJECT_KEY, "reconciled_at")
+    if watermark is None or full:
+        store.delete(PROJECT_KEY, store.keys(PROJECT_KEY) - seen)
+        store.set_meta(PROJECT_KEY, "reconciled_at", started)
+    elif reconciled is None or started - reconciled >= RECONCILE_INTERVAL:
+        reconcile_deleted(store)
+        store.set_meta(PROJECT_KEY, "reconciled_at", started)
+    store.set_meta(PROJECT_KEY, "watermark", started)
+    store.set_meta(PROJECT_KEY, "team_skills_hash", skills_hash)
+
+def sync_store(full=False):
+    """Sync the local issue store; returns how many issues changed."""
+    return sum(1 for _ in iter_sync(full))
+
+def iter_dataset():
+    """
+    Dataset rows as soon as they are usable. On a cold store they stream straight out of
+    the fetch/normalize/embed pipeline; otherwise the (cheap) delta sync runs first and
+    the stored rows are read back.
+    """
+    warm_up()  # load the model while the issues are downloading
+    if get_store().count(PROJECT_KEY) == 0:
+        yield from iter_sync()
+        return
+    sync_store()
+    yield from get_store().rows(PROJECT_KEY)
+
+def sync_dataset(data):
+    """
+    Delta-sync the store and apply what changed to an already loaded dataset one issue at
+    a time (replace, delete, insert), so an NLQDataset's aggregates follow as per-issue
+    deltas instead of being rebuilt. Returns how many issues changed.
+    """
+    positions = {r["key"]: i for i, r in enumerate(data)}
+    fresh = []
+    replaced = 0
+    for row in iter_sync():
+        pos = positions.get(row["key"])
+        if pos is None:
+            fresh.append(row)
+        else:
+            data[pos] = row
+            replaced += 1
+    gone = positions.keys() - get_store().keys(PROJECT_KEY)
+    for pos in sorted((positions[k] for k in gone), reverse=True):
+        del data[pos]
+    for row in reversed(fresh):  # new issues are the newest, and iter_sync yields newest first
+        data.insert(0, row)
+    return replaced + len(gone) + len(fresh)
+
 def load_dataset():
-    jql = f'project = "{PROJECT_KEY}" ORDER BY created DESC'
-    raw = fetch_all_issues(jql, max_results=1000)
-    team_embeds = build_team_embeddings()
-    return [normalize_issue(it, team_embeds) for it in raw]
+    rows = NLQDataset(iter_dataset())
+    rows.columns().build_indexes()  # build the columnar view and its indexes now rather than on the first question
+    rows.aggregates()  # counts are kept current from here on by per-row deltas
+    return rows
 
 
-def count_by(predicate, data): return sum(1 for r in data if predicate(r))
-def group_by(keyfn, data):
-    buckets = defaultdict(list)
-    for r in data: buckets[keyfn(r)].append(r)
-    return buckets
 def pct(n, d): return 0.0 if d==0 else round((n/d)*100,1)
 def days_ago(n): return datetime.now(timezone.utc) - timedelta(days=n)
 
+def listing(cols, ids, line, limit=50):
+    """The first `limit` matching rows, one line each; only those rows are materialized."""
+    lines = [line(r) for r in cols.matching(ids[:limit])]
+    more = "" if len(ids) <= limit else f"\n(and {len(ids)-limit} more...)"
+    return "\n".join(lines) + more
+
 def ans_how_many_backlog(data):
     # Backlog heuristics: statusCategory To Do and no sprint
-    n = count_by(lambda r: (r["statusCategory"] == "To Do") and (r["sprint"] is None), data)
+    n = aggregates(data).backlog()
     return f"{n} ticket(s) are in the backlog."
 
 def ans_how_many_in_sprint(data, sprint_name):
-    n = count_by(lambda r: (r["sprint"] or "").lower() == sprint_name.lower(), data)
+    n = aggregates(data).sprint(sprint_name)[0]
     return f"{n} ticket(s) are in sprint '{sprint_name}'."
 
 def ans_how_many_assigned_to_person(data, person):
-    n = count_by(lambda r: (r["assigneeName"] and r["assigneeName"].lower() == person.lower()) or
-                           (r["assigneeEmail"] and r["assigneeEmail"].lower() == person.lower()), data)
+    n = aggregates(data).assigned_to(person) if person else 0
     return f"{n} ticket(s) are assigned to {person}."
 
 def ans_how_many_unassigned(data):
-    n = count_by(lambda r: not r["assigneeEmail"], data)
+    n = aggregates(data).count("assignee_email_ci", "")
     return f"{n} ticket(s) are unassigned."
 
 def ans_percent_closed(data):
-    total = len(data)
-    closed = count_by(lambda r: r["statusCategory"] == "Done", data)
+    agg = aggregates(data)
+    total = agg.total
+    closed = agg.count("category", "Done")
     return f"{pct(closed, total)}% of tickets are closed ({closed}/{total})."
 
 def ans_closed_last_period(data, days):
-    since = days_ago(days)
-    n = count_by(lambda r: r["resolved"] and r["resolved"] >= since, data)
+    n = columns(data).count_since("resolved", days_ago(days))
     label = "week" if days == 7 else f"{days} days"
     return f"{n} ticket(s) closed in the last {label}."
 
 def ans_in_progress_count(data):
-    n = count_by(lambda r: r["statusCategory"] == "In Progress", data)
+    n = aggregates(data).count("category", "In Progress")
     return f"{n} ticket(s) are currently in progress."
 
 def ans_list_active(data):
-    active = [r for r in data if r["statusCategory"] in ("To Do", "In Progress")]
-    if not active:
+    cols = columns(data)
+    active = np.union1d(cols.category("To Do"), cols.category("In Progress"))
+    if not len(active):
         return "No active tickets."
-    lines = [f"- {r['key']}: {r['summary']}  • {r['status']}  • {r.get('assigneeName') or 'Unassigned'}" for r in active[:50]]
-    more = "" if len(active) <= 50 else f"\n(and {len(active)-50} more...)"
-    return "Active tickets:\n" + "\n".join(lines) + more
+    return "Active tickets:\n" + listing(cols, active, lambda r: f"- {r['key']}: {r['summary']}  • {r['status']}  • {r.get('assigneeName') or 'Unassigned'}")
 
 def ans_list_by_status(data):
-    buckets = group_by(lambda r: r["status"] or "Unknown", data)
+    buckets = Counter()
+    for status, n in aggregates(data).counts("status").items():
+        buckets[status or "Unknown"] += n
     lines = []
     for st in sorted(buckets.keys()):
-        lines.append(f"{st}: {len(buckets[st])}")
+        lines.append(f"{st}: {buckets[st]}")
     return "Tickets by status:\n" + "\n".join(lines)
 
 def ans_list_closed(data):
-    closed = [r for r in data if r["statusCategory"] == "Done"]
+    cols = columns(data)
+    closed = cols.category("Done")
     count = len(closed)
-    if not closed:
+    if not len(closed):
         return "No closed tickets found."
-    lines = [f"Found {count} closed ticket(s):"]
-    for r in closed[:50]:
+    def line(r):
         resolved_date = r.get('resolved')
         resolved_str = resolved_date.strftime('%d %b %Y') if resolved_date else 'N/A'
-        lines.append(f"- {r['key']}: {r['summary']}  • Resolved: {resolved_str}")
-    more = "" if count <= 50 else f"\n(and {count-50} more...)"
-    return "\n".join(lines) + more
+        return f"- {r['key']}: {r['summary']}  • Resolved: {resolved_str}"
+    return f"Found {count} closed ticket(s):\n" + listing(cols, closed, line)
 
 def ans_team_most_tickets(data):
-    buckets = group_by(lambda r: r["team"], data)
+    buckets = list(aggregates(data).counts("team").items())
     if not buckets:
         return "No tickets found."
-    best = max(buckets.items(), key=lambda kv: len(kv[1]))
-    return f"Team with the most tickets: {best[0]} ({len(best[1])})."
+    best = max(buckets, key=lambda kv: kv[1])
+    return f"Team with the most tickets: {best[0]} ({best[1]})."
 
 def ans_team_least_tickets(data):
-    buckets = group_by(lambda r: r["team"], data)
+    buckets = list(aggregates(data).counts("team").items())
     if not buckets:
         return "No tickets found."
-    best = min(buckets.items(), key=lambda kv: len(kv[1]))
-    return f"Team with the least tickets: {best[0]} ({len(best[1])})."
+    best = min(buckets, key=lambda kv: kv[1])
+    return f"Team with the least tickets: {best[0]} ({best[1]})."
 
 def ans_team_percent_closed(data, team):
-    subset = [r for r in data if (r["team"] or "").lower() == team.lower()]
-    if not subset:
+    total, closed = aggregates(data).team_closed(team)
+    if not total:
         return f"No tickets for team '{team}'."
-    closed = count_by(lambda r: r["statusCategory"] == "Done", subset)
-    return f"{pct(closed, len(subset))}% of {team} tickets are closed ({closed}/{len(subset)})."
+    return f"{pct(closed, total)}% of {team} tickets are closed ({closed}/{total})."
 
 def ans_backlog_for_team(data, team):
-    subset = [r for r in data if (r["team"] or "").lower() == team.lower() and r["statusCategory"] == "To Do" and r["sprint"] is None]
-    if not subset:
+    cols = columns(data)
+    subset = cols.where(cols.where(cols.team.ids_ci(team), "status_category", "To Do"), "sprint", None)
+    if not len(subset):
         return f"No backlog tickets for team '{team}'."
-    lines = [f"- {r['key']}: {r['summary']}" for r in subset[:50]]
-    more = "" if len(subset) <= 50 else f"\n(and {len(subset)-50} more...)"
-    return f"Backlog tickets for {team}:\n" + "\n".join(lines) + more
+    return f"Backlog tickets for {team}:\n" + listing(cols, subset, lambda r: f"- {r['key']}: {r['summary']}")
+
+def member_counts(cols, rows):
+    """{member: count} over the row ids, in order of first occurrence (like a Counter built row by row)."""
+    return dict(cols.member.value_counts(rows, skip_empty=True))
 
 def ans_member_efficiency(data, team, days=30):
     since = days_ago(days)
-    subset = [r for r in data if (r["team"] or "").lower() == team.lower()]
-    if not subset:
+    cols = columns(data)
+    subset = cols.team.ids_ci(team)
+    if not len(subset):
         return f"No tickets for team '{team}'."
     # efficiency: closed in window / assigned in window (or total assigned if none)
-    per_member = defaultdict(lambda: {"assigned": 0, "closed": 0})
-    for r in subset:
-        m = r["assigneeEmail"] or r["assigneeName"]
-        if not m:
-            continue
-        if r["created"] and r["created"] >= since:
-            per_member[m]["assigned"] += 1
-        # Consider closed in window if resolved in window
-        if r["resolved"] and r["resolved"] >= since:
-            per_member[m]["closed"] += 1
-    if not per_member:
+    assigned_rows = cols.where_time(subset, "created", since)
+    closed_rows = cols.where_time(subset, "resolved", since)
+    members = member_counts(cols, np.union1d(assigned_rows, closed_rows))
+    if not members:
         return f"No assignees found for team '{team}'."
+    assigned = member_counts(cols, assigned_rows)
+    closed = member_counts(cols, closed_rows)
     scores = []
-    for m, v in per_member.items():
-        denom = v["assigned"] if v["assigned"] > 0 else 1
-        eff = v["closed"] / denom
-        scores.append((m, eff, v["closed"], v["assigned"]))
+    for m in members:
+        denom = assigned.get(m, 0) if assigned.get(m, 0) > 0 else 1
+        eff = closed.get(m, 0) / denom
+        scores.append((m, eff, closed.get(m, 0), assigned.get(m, 0)))
     scores.sort(key=lambda x: x[1], reverse=True)
     best = scores[0]
     return f"Most efficient member in {team}: {best[0]} (closed {best[2]} / assigned {best[3]} last {days} days, efficiency {best[1]:.2f})."
 
 def ans_member_least_active(data, team, days=30):
-    since = days_ago(days)
-    subset = [r for r in data if (r["team"] or "").lower() == team.lower()]
-    per_member_closed = Counter()
-    for r in subset:
-        m = r["assigneeEmail"] or r["assigneeName"]
-        if not m:
-            continue
-        if r["resolved"] and r["resolved"] >= since:
-            per_member_closed[m] += 1
+    cols = columns(data)
+    per_member_closed = member_counts(cols, cols.where_time(cols.team.ids_ci(team), "resolved", days_ago(days)))
     if not per_member_closed:
         return f"No resolved tickets for team '{team}' in last {days} days."
     least = min(per_member_closed.items(), key=lambda kv: kv[1])
     return f"Least active member in {team}: {least[0]} ({least[1]} ticket(s) closed in last {days} days)."
 
 def ans_member_with_most_open(data):
-    per_member_open = Counter()
-    for r in data:
-        if r["statusCategory"] != "Done":
-            m = r["assigneeEmail"] or r["assigneeName"]
-            if m:
-                per_member_open[m] += 1
+    per_member_open = aggregates(data).counts("open_member")
     if not per_member_open:
         return "No open tickets per member."
     who = max(per_member_open.items(), key=lambda kv: kv[1])
@@ -301,12 +401,8 @@ def ans_closed_last_month_top_member(data):
     first_of_this_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     last_month_end = first_of_this_month - timedelta(seconds=1)
     last_month_start = last_month_end.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    per_member = Counter()
-    for r in data:
-        if r["resolved"] and last_month_start <= r["resolved"] <= last_month_end:
-            m = r["assigneeEmail"] or r["assigneeName"]
-            if m:
-                per_member[m] += 1
+    cols = columns(data)
+    per_member = member_counts(cols, cols.between("resolved", last_month_start, last_month_end))
     if not per_member:
         return "No tickets were closed last month."
     top = max(per_member.items(), key=lambda kv: kv[1])
@@ -314,72 +410,59 @@ def ans_closed_last_month_top_member(data):
 
 def ans_best_suited_for_ticket(data, key):
     # Find the issue and pick the team, then recommend least-loaded member of that team
-    issue = next((r for r in data if r["key"].lower() == key.lower()), None)
-    if not issue:
+    issue = aggregates(data).issue(key)
+    if issue is None:
         return f"Ticket {key} not found."
     team = issue["team"] or "General"
     members = TEAM_MEMBERS.get(team, TEAM_MEMBERS.get("General", []))
     if not members:
         return f"No members found for team {team}."
     # compute current load across project
-    per_member_open = Counter()
-    for r in data:
-        if r["statusCategory"] != "Done":
-            m = r["assigneeEmail"] or r["assigneeName"]
-            if m:
-                per_member_open[m] += 1
+    per_member_open = aggregates(data).counts("open_member")
     # Choose least loaded among team
     ranked = sorted(members, key=lambda m: per_member_open.get(m, 0))
     choice = ranked[0]
     return f"Best suited for {key}: {choice} (team {team}, current open load {per_member_open.get(choice,0)})."
 
 def ans_created_in_period(data, days):
-    since = days_ago(days)
-    n = count_by(lambda r: r["created"] and r["created"] >= since, data)
+    n = columns(data).count_since("created", days_ago(days))
     label = "week" if days == 7 else f"{days} days"
     return f"{n} ticket(s) were created in the last {label}."
 
 def ans_resolved_in_period(data, days):
-    since = days_ago(days)
-    n = count_by(lambda r: r["resolved"] and r["resolved"] >= since, data)
+    n = columns(data).count_since("resolved", days_ago(days))
     label = "week" if days == 7 else f"{days} days"
     return f"{n} ticket(s) were resolved in the last {label}."
 
 def ans_stale_in_status(data, status_name, days):
-    since = days_ago(days)
-    stale = [r for r in data if (r["status"] or "").lower() == status_name.lower() and (r["updated"] and r["updated"] < since)]
-    if not stale:
+    cols = columns(data)
+    stale = cols.where_time(cols.status.ids_ci(status_name), "updated", days_ago(days), since=False)
+    if not len(stale):
         return f"No tickets in '{status_name}' for more than {days} days."
-    lines = [f"- {r['key']}: {r['summary']}" for r in stale[:50]]
-    more = "" if len(stale) <= 50 else f"\n(and {len(stale)-50} more...)"
-    return f"Tickets in '{status_name}' for more than {days} days:\n" + "\n".join(lines) + more
+    return f"Tickets in '{status_name}' for more than {days} days:\n" + listing(cols, stale, lambda r: f"- {r['key']}: {r['summary']}")
 
 def ans_changed_last_24h(data):
-    since = datetime.now(timezone.utc) - timedelta(hours=24)
-    changed = [r for r in data if r["updated"] and r["updated"] >= since]
-    if not changed:
+    cols = columns(data)
+    changed = cols.since("updated", datetime.now(timezone.utc) - timedelta(hours=24))
+    if not len(changed):
         return "No tickets changed status in the last 24 hours."
-    lines = [f"- {r['key']}: {r['summary']}  • updated {r['updated'].astimezone().strftime('%d %b %Y %H:%M')}" for r in changed[:50]]
-    more = "" if len(changed) <= 50 else f"\n(and {len(changed)-50} more...)"
-    return "Recently changed (24h):\n" + "\n".join(lines) + more
+    return "Recently changed (24h):\n" + listing(cols, changed, lambda r: f"- {r['key']}: {r['summary']}  • updated {r['updated'].astimezone().strftime('%d %b %Y %H:%M')}")
 
 def ans_idle_gt_days(data, days):
-    since = days_ago(days)
-    idle = [r for r in data if (r["updated"] and r["updated"] < since) and r["statusCategory"] != "Done"]
-    if not idle:
+    cols = columns(data)
+    idle = cols.where(cols.before("updated", days_ago(days)), "status_category", "Done", keep=False)
+    if not len(idle):
         return f"No tickets idle for more than {days} days."
-    lines = [f"- {r['key']}: {r['summary']}" for r in idle[:50]]
-    more = "" if len(idle) <= 50 else f"\n(and {len(idle)-50} more...)"
-    return f"Tickets idle for more than {days} days:\n" + "\n".join(lines) + more
+    return f"Tickets idle for more than {days} days:\n" + listing(cols, idle, lambda r: f"- {r['key']}: {r['summary']}")
 
 def ans_sprint_unassigned(data, sprint_name):
-    n = count_by(lambda r: (r["sprint"] or "").lower() == sprint_name.lower() and not r["assigneeEmail"], data)
+    total, _, assigned = aggregates(data).sprint(sprint_name)
+    n = total - assigned
     return f"{n} unassigned ticket(s) in sprint '{sprint_name}'."
 
 def ans_sprint_overloaded_members(data, sprint_name):
     # overloaded: > ceil(avg tickets per member) in that sprint
-    in_sprint = [r for r in data if (r["sprint"] or "").lower() == sprint_name.lower() and r["statusCategory"] != "Done"]
-    per_member = Counter(r["assigneeEmail"] or r["assigneeName"] for r in in_sprint if (r["assigneeEmail"] or r["assigneeName"]))
+    per_member = aggregates(data).counts("sprint_open_member", sprint_name)
     if not per_member:
         return f"No assigned, open tickets in sprint '{sprint_name}'."
     avg = math.ceil(sum(per_member.values()) / max(1, len(per_member)))
@@ -391,88 +474,102 @@ def ans_sprint_overloaded_members(data, sprint_name):
     return f"Overloaded members in sprint '{sprint_name}':\n" + "\n".join(lines)
 
 def ans_sprint_team_with_most(data, sprint_name):
-    in_sprint = [r for r in data if (r["sprint"] or "").lower() == sprint_name.lower()]
-    if not in_sprint:
+    grp = list(aggregates(data).counts("sprint_team", sprint_name).items())
+    if not grp:
         return f"No tickets in sprint '{sprint_name}'."
-    grp = group_by(lambda r: r["team"], in_sprint)
-    best = max(grp.items(), key=lambda kv: len(kv[1]))
-    return f"In sprint '{sprint_name}', {best[0]} has the most tickets ({len(best[1])})."
+    best = max(grp, key=lambda kv: kv[1])
+    return f"In sprint '{sprint_name}', {best[0]} has the most tickets ({best[1]})."
 
 def ans_sprint_closure_rate(data, sprint_name):
-    in_sprint = [r for r in data if (r["sprint"] or "").lower() == sprint_name.lower()]
-    if not in_sprint:
+    total, done, _ = aggregates(data).sprint(sprint_name)
+    if not total:
         return f"No tickets in sprint '{sprint_name}'."
-    done = sum(1 for r in in_sprint if r["statusCategory"] == "Done")
-    return f"Sprint '{sprint_name}' closure rate: {pct(done, len(in_sprint))}% ({done}/{len(in_sprint)})."
+    return f"Sprint '{sprint_name}' closure rate: {pct(done, total)}% ({done}/{total})."
 
 def ans_backlog_size_by_team(data):
-    backlog = [r for r in data if r["statusCategory"] == "To Do" and r["sprint"] is None]
-    if not backlog:
+    grp = list(aggregates(data).counts("backlog_team").items())
+    if not grp:
         return "Backlog is empty."
-    grp = group_by(lambda r: r["team"], backlog)
-    lines = [f"- {team}: {len(rows)}" for team, rows in sorted(grp.items(), key=lambda kv: kv[0])]
+    lines = [f"- {team}: {n}" for team, n in sorted(grp, key=lambda kv: kv[0])]
     return "Backlog size by team:\n" + "\n".join(lines)
 
 def ans_backlog_growth_last_month(data):
     # growth = created last 30d minus resolved last 30d (approx backlog delta)
-    created = count_by(lambda r: r["created"] and r["created"] >= days_ago(30), data)
-    resolved = count_by(lambda r: r["resolved"] and r["resolved"] >= days_ago(30), data)
+    cols = columns(data)
+    created = cols.count_since("created", days_ago(30))
+    resolved = cols.count_since("resolved", days_ago(30))
     delta = created - resolved
     trend = "grew" if delta > 0 else ("shrunk" if delta < 0 else "stayed flat")
     return f"Backlog {trend} by {abs(delta)} in the last 30 days (created {created}, resolved {resolved})."
 
 def ans_backlog_older_than(data, days):
-    cutoff = days_ago(days)
-    oldies = [r for r in data if r["statusCategory"] == "To Do" and (r["sprint"] is None) and r["created"] and r["created"] < cutoff]
-    if not oldies:
+    cols = columns(data)
+    oldies = cols.where_time(cols.backlog(), "created", days_ago(days), since=False)
+    if not len(oldies):
         return f"No backlog tickets older than {days} days."
-    lines = [f"- {r['key']}: {r['summary']}" for r in oldies[:50]]
-    more = "" if len(oldies) <= 50 else f"\n(and {len(oldies)-50} more...)"
-    return f"Backlog tickets older than {days} days:\n" + "\n".join(lines) + more
+    return f"Backlog tickets older than {days} days:\n" + listing(cols, oldies, lambda r: f"- {r['key']}: {r['summary']}")
 
 
+# (pattern, keyword, handler, clock) in priority order. The keyword must appear literally in
+# every match of the pattern: the router only tries intents whose keyword is in the query.
+# CLOCK marks answers that move with the current time ("last week", "older than 30 days"):
+# the answer cache also keys them by an ANSWER_CACHE_BUCKET time bucket.
+FIXED, CLOCK = False, True
 INTENT_PATTERNS = [
-    (re.compile(r"how many tickets.* in backlog|backlog.* size|how many.* backlog tickets", re.I), lambda m, d: ans_how_many_backlog(d)),
-    (re.compile(r"how many tickets.* in sprint ([\w\s-]+)", re.I), lambda m, d: ans_how_many_in_sprint(d, m.group(1).strip())),
-    (re.compile(r"(?:how many tickets.* assigned to|tickets for) (.+)", re.I), lambda m, d: ans_how_many_assigned_to_person(d, m.group(1).strip())),
-    (re.compile(r"how many.* unassigned tickets|number of unassigned tickets|unassigned ticket count", re.I), lambda m, d: ans_how_many_unassigned(d)),
-    (re.compile(r"what percentage.* closed|closed tickets percentage|percent.* closed tickets", re.I), lambda m, d: ans_percent_closed(d)),
-    (re.compile(r"how many.* closed.* last week|closed tickets.* last week", re.I), lambda m, d: ans_closed_last_period(d, 7)),
-    (re.compile(r"how many.* closed.* last (\d+)\s*days|closed tickets.* last (\d+)\s*days", re.I), lambda m, d: ans_closed_last_period(d, int(m.group(1)))),
-    (re.compile(r"how many tickets.* in progress|in progress ticket count|number of.* in progress", re.I), lambda m, d: ans_in_progress_count(d)),
-    (re.compile(r"list.* active tickets|show.* active tickets", re.I), lambda m, d: ans_list_active(d)),
-    (re.compile(r"list tickets by status|ticket count by status|tickets by status", re.I), lambda m, d: ans_list_by_status(d)),
-    (re.compile(r"list.* closed tickets|show.* closed tickets", re.I), lambda m, d: ans_list_closed(d)),
-
-    (re.compile(r"which team has the most tickets|team with most tickets", re.I), lambda m, d: ans_team_most_tickets(d)),
-    (re.compile(r"which team has the least tickets|team with least tickets", re.I), lambda m, d: ans_team_least_tickets(d)),
-    (re.compile(r"what percentage of tickets for (.+) are closed", re.I), lambda m, d: ans_team_percent_closed(d, m.group(1).strip())),
-    (re.compile(r"show.* backlog tickets for (.+)|backlog for (.+)", re.I), lambda m, d: ans_backlog_for_team(d, m.group(1) or m.group(2))),
-
-    (re.compile(r"who is the most efficient member of (.+)|most efficient in (.+)", re.I), lambda m, d: ans_member_efficiency(d, m.group(1) or m.group(2))),
-    (re.compile(r"who is the least active member of (.+)|least active in (.+)", re.I), lambda m, d: ans_member_least_active(d, m.group(1) or m.group(2))),
-    (re.compile(r"which member has the most unclosed tickets|most open tickets by member", re.I), lambda m, d: ans_member_with_most_open(d)),
-    (re.compile(r"who closed the most tickets last month", re.I), lambda m, d: ans_closed_last_month_top_member(d)),
-
-    (re.compile(r"who is best suited for ticket ([A-Z]+-\d+)|best person for ([A-Z]+-\d+)", re.I), lambda m, d: ans_best_suited_for_ticket(d, m.group(1) or m.group(2))),
-
-    (re.compile(r"how many tickets.* created.* last week", re.I), lambda m, d: ans_created_in_period(d, 7)),
-    (re.compile(r"how many tickets.* resolved.* last week", re.I), lambda m, d: ans_resolved_in_period(d, 7)),
-    (re.compile(r"list tickets in (?:to do|todo) for more than (\d+)\s*days", re.I), lambda m, d: ans_stale_in_status(d, "To Do", int(m.group(1)))),
-    (re.compile(r"list tickets in progress for more than (\d+)\s*days", re.I), lambda m, d: ans_stale_in_status(d, "In Progress", int(m.group(1)))),
-    (re.compile(r"which tickets changed.* last 24 hours", re.I), lambda m, d: ans_changed_last_24h(d)),
-    (re.compile(r"which tickets.* idle for more than (\d+)\s*days", re.I), lambda m, d: ans_idle_gt_days(d, int(m.group(1)))),
-
-    (re.compile(r"how many.* unassigned.* in sprint ([\w\s-]+)", re.I), lambda m, d: ans_sprint_unassigned(d, m.group(1).strip())),
-    (re.compile(r"which members in sprint ([\w\s-]+) are overloaded|overloaded members in sprint ([\w\s-]+)", re.I), lambda m, d: ans_sprint_overloaded_members(d, m.group(1) or m.group(2))),
-    (re.compile(r"which team in sprint ([\w\s-]+) is handling the most tickets|team with most tickets in sprint ([\w\s-]+)", re.I), lambda m, d: ans_sprint_team_with_most(d, m.group(1) or m.group(2))),
-    (re.compile(r"closure rate for sprint ([\w\s-]+)", re.I), lambda m, d: ans_sprint_closure_rate(d, m.group(1).strip())),
-
-    (re.compile(r"backlog size by team", re.I), lambda m, d: ans_backlog_size_by_team(d)),
-    (re.compile(r"backlog growth.* last month", re.I), lambda m, d: ans_backlog_growth_last_month(d)),
-    (re.compile(r"backlog tickets older than (\d+)\s*days", re.I), lambda m, d: ans_backlog_older_than(d, int(m.group(1)))),
+    (re.compile(r"how many tickets.* in backlog|backlog.* size|how many.* backlog tickets", re.I), "backlog", lambda m, d: ans_how_many_backlog(d), FIXED),
+    (re.compile(r"how many tickets.* in sprint ([\w\s-]+)", re.I), "in sprint", lambda m, d: ans_how_many_in_sprint(d, m.group(1).strip()), FIXED),
+    (re.compile(r"(?:how many tickets.* assigned to|tickets for) (.+)", re.I), "tickets", lambda m, d: ans_how_many_assigned_to_person(d, m.group(1).strip()), FIXED),
+    (re.compile(r"how many.* unassigned tickets|number of unassigned tickets|unassigned ticket count", re.I), "unassigned", lambda m, d: ans_how_many_unassigned(d), FIXED),
+    (re.compile(r"what percentage.* closed|closed tickets percentage|percent.* closed tickets", re.I), "closed", lambda m, d: ans_percent_closed(d), FIXED),
+    (re.compile(r"how many.* closed.* last week|closed tickets.* last week", re.I), "last week", lambda m, d: ans_closed_last_period(d, 7), CLOCK),
+    (re.compile(r"how many.* closed.* last (\d+)\s*days|closed tickets.* last (\d+)\s*days", re.I), "closed", lambda m, d: ans_closed_last_period(d, int(m.group(1))), CLOCK),
+    (re.compile(r"how many tickets.* in progress|in progress ticket count|number of.* in progress", re.I), "in progress", lambda m, d: ans_in_progress_count(d), FIXED),
+    (re.compile(r"list.* active tickets|show.* active tickets", re.I), "active tickets", lambda m, d: ans_list_active(d), FIXED),
+    (re.compile(r"list tickets by status|ticket count by status|tickets by status", re.I), "by status", lambda m, d: ans_list_by_status(d), FIXED),
+    (re.compile(r"list.* closed tickets|show.* closed tickets", re.I), "closed tickets", lambda m, d: ans_list_closed(d), FIXED),
+
+    (re.compile(r"which team has the most tickets|team with most tickets", re.I), "most tickets", lambda m, d: ans_team_most_tickets(d), FIXED),
+    (re.compile(r"which team has the least tickets|team with least tickets", re.I), "least tickets", lambda m, d: ans_team_least_tickets(d), FIXED),
+    (re.compile(r"what percentage of tickets for (.+) are closed", re.I), "percentage of tickets for", lambda m, d: ans_team_percent_closed(d, m.group(1).strip()), FIXED),
+    (re.compile(r"show.* backlog tickets for (.+)|backlog for (.+)", re.I), "backlog", lambda m, d: ans_backlog_for_team(d, m.group(1) or m.group(2)), FIXED),
+
+    (re.compile(r"who is the most efficient member of (.+)|most efficient in (.+)", re.I), "most efficient", lambda m, d: ans_member_efficiency(d, m.group(1) or m.group(2)), CLOCK),
+    (re.compile(r"who is the least active member of (.+)|least active in (.+)", re.I), "least active", lambda m, d: ans_member_least_active(d, m.group(1) or m.group(2)), CLOCK),
+    (re.compile(r"which member has the most unclosed tickets|most open tickets by member", re.I), "member", lambda m, d: ans_member_with_most_open(d), FIXED),
+    (re.compile(r"who closed the most tickets last month", re.I), "who closed the most tickets last month", lambda m, d: ans_closed_last_month_top_member(d), CLOCK),
+
+    (re.compile(r"who is best suited for ticket ([A-Z]+-\d+)|best person for ([A-Z]+-\d+)", re.I), "best", lambda m, d: ans_best_suited_for_ticket(d, m.group(1) or m.group(2)), FIXED),
+
+    (re.compile(r"how many tickets.* created.* last week", re.I), "created", lambda m, d: ans_created_in_period(d, 7), CLOCK),
+    (re.compile(r"how many tickets.* resolved.* last week", re.I), "resolved", lambda m, d: ans_resolved_in_period(d, 7), CLOCK),
+    (re.compile(r"list tickets in (?:to do|todo) for more than (\d+)\s*days", re.I), "for more than", lambda m, d: ans_stale_in_status(d, "To Do", int(m.group(1))), CLOCK),
+    (re.compile(r"list tickets in progress for more than (\d+)\s*days", re.I), "in progress for more than", lambda m, d: ans_stale_in_status(d, "In Progress", int(m.group(1))), CLOCK),
+    (re.compile(r"which tickets changed.* last 24 hours", re.I), "last 24 hours", lambda m, d: ans_changed_last_24h(d), CLOCK),
+    (re.compile(r"which tickets.* idle for more than (\d+)\s*days", re.I), "idle for more than", lambda m, d: ans_idle_gt_days(d, int(m.group(1))), CLOCK),
+
+    (re.compile(r"how many.* unassigned.* in sprint ([\w\s-]+)", re.I), "unassigned", lambda m, d: ans_sprint_unassigned(d, m.group(1).strip()), FIXED),
+    (re.compile(r"which members in sprint ([\w\s-]+) are overloaded|overloaded members in sprint ([\w\s-]+)", re.I), "overloaded", lambda m, d: ans_sprint_overloaded_members(d, m.group(1) or m.group(2)), FIXED),
+    (re.compile(r"which team in sprint ([\w\s-]+) is handling the most tickets|team with most tickets in sprint ([\w\s-]+)", re.I), "in sprint", lambda m, d: ans_sprint_team_with_most(d, m.group(1) or m.group(2)), FIXED),
+    (re.compile(r"closure rate for sprint ([\w\s-]+)", re.I), "closure rate for sprint", lambda m, d: ans_sprint_closure_rate(d, m.group(1).strip()), FIXED),
+
+    (re.compile(r"backlog size by team", re.I), "backlog size by team", lambda m, d: ans_backlog_size_by_team(d), FIXED),
+    (re.compile(r"backlog growth.* last month", re.I), "backlog growth", lambda m, d: ans_backlog_growth_last_month(d), CLOCK),
+    (re.compile(r"backlog tickets older than (\d+)\s*days", re.I), "backlog tickets older than", lambda m, d: ans_backlog_older_than(d, int(m.group(1))), CLOCK),
 ]
 
+INTENT_ROUTER = IntentRouter([(pattern, keyword) for pattern, keyword, *_ in INTENT_PATTERNS])
+ANSWER_CACHE = AnswerCache(ANSWER_CACHE_SIZE)
+
+def normalize_query(q): return " ".join(q.casefold().split()).rstrip("?!. ")
+
+def answer_cache_key(q, index, match, data):
+    """(query, intent, arguments, dataset version, time bucket), or None when the answer can't be cached."""
+    version = getattr(data, "version", None)  # only NLQDataset tracks changes
+    if version is None:
+        return None
+    bucket = int(time.time() // ANSWER_CACHE_BUCKET) if INTENT_PATTERNS[index][3] else None
+    return (normalize_query(q), index, match.groups(), version, bucket)
+
 
 HELP_TEXT = """
 Examples you can ask:
@@ -529,30 +626,62 @@ def answer_query(q, data):
     Finds a matching intent pattern for the user's query and returns the answer.
     """
     q = q.strip()
-    for pattern, fn in INTENT_PATTERNS:
-        match = pattern.search(q)
-        if match:
-            try:
-                # Pass the match object to the handler function
-                return fn(match, data)
-            except Exception as e:
-                return f"⚠ Error answering that: {e}"
-    
+    if len(q) > MAX_QUERY_CHARS:
+        return f"⚠ That question is too long; please keep it under {MAX_QUERY_CHARS} characters."
+    index, match = INTENT_ROUTER.route(q)
+    if match:
+        key = answer_cache_key(q, index, match, data)
+        if key is not None:
+            answer = ANSWER_CACHE.get(key)
+            if answer is not None:
+                return answer
+        try:
+            # Pass the match object to the handler function
+            answer = INTENT_PATTERNS[index][2](match, data)
+        except Exception as e:
+            return f"⚠ Error answering that: {e}"
+        if key is not None:
+            ANSWER_CACHE.put(key, answer)
+        return answer
+
     # Fallback response if no pattern matches
     return "Sorry, that query is not in the question bank. Type 'help' to see what I can answer."
 
 
+def load_in_background(data):
+    """Append iter_dataset() rows to `data` on a thread, so queries can run on what has arrived."""
+    def run():
+        try:
+            data.aggregates()  # each appended row is then counted as it arrives
+            for row in iter_dataset():
+                data.append(row)
+            data.columns().build_indexes()
+        except Exception as e:
+            print(f"\n⚠ Loading failed: {e}")
+    loader = threading.Thread(target=run, name="jira-nlq-loader", daemon=True)
+    loader.start()
+    return loader
+
 def main():
-    print("🔄 Loading Jira data...")
-    data = load_dataset()
-    print(f"✅ Loaded {len(data)} issue(s) from project {PROJECT_KEY}. Type 'help' for examples.\n")
+    if not all([JIRA_URL, PROJECT_KEY, EMAIL, API_TOKEN]):
+        raise SystemExit(" Missing env vars. Ensure JIRA_URL, PROJECT_KEY, EMAIL, API_TOKEN are in your .env")
+    print(f"🔄 Loading Jira data for project {PROJECT_KEY} in the background. Type 'help' for examples.\n")
+    data = NLQDataset()
+    loader = load_in_background(data)
+    webhooks = None
+    if os.getenv("JIRA_WEBHOOK_PORT"):
+        from jira_webhook import WebhookApplier, serve
+        webhooks = serve(WebhookApplier(data), background=True)
+        print(f"📡 Applying Jira webhooks received on port {webhooks.server_port}.\n")
     while True:
         try: q = input("nlq> ").strip()
         except (EOFError, KeyboardInterrupt): print("\n👋 byebye!"); break
         if not q: continue
         if q.lower() in ("exit", "quit", ":q"): print("👋 Byebye!"); break
         if q.lower() == "help": print(HELP_TEXT); continue
-        if q.lower() == "refresh": print("🔄 Refreshing..."); data = load_dataset(); print(f"✅ Reloaded {len(data)} issue(s).\n"); continue
+        if q.lower() == "cache": print(ANSWER_CACHE.stats(), "\n"); continue
+        if q.lower() == "refresh": print("🔄 Refreshing..."); data = load_dataset(); webhooks and webhooks.applier.attach(data); print(f"✅ Reloaded {len(data)} issue(s).\n"); continue
+        if loader.is_alive(): print(f"(still loading — answering from {len(data)} issue(s) so far)")
         print(answer_query(q, data), "\n")
 
 if __name__ == "__main__":
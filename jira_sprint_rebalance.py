@@ -1,9 +1,12 @@
 import os
 from collections import defaultdict
-from jira import JIRA
 from dotenv import load_dotenv
-from teams import TEAM_MEMBERS, TEAM_SKILLS
-from embeddings import embed_text, cosine_sim, extract_text_from_jira_description
+import jira_http
+from teams import TEAM_MEMBERS
+from adf import issue_description_text
+from embeddings import TEXT_MAX_CHARS, detect_teams, warm_up
+from user_directory import get_directory
+from bulk_assign import WRITE_RATE, assign_many, summarize
 
 load_dotenv()
 JIRA_URL = os.getenv("JIRA_URL")
@@ -11,69 +14,154 @@ EMAIL = os.getenv("EMAIL")
 API_TOKEN = os.getenv("API_TOKEN")
 PROJECT_KEY = os.getenv("PROJECT_KEY")
 
-jira = JIRA(server=JIRA_URL, basic_auth=(EMAIL, API_TOKEN))
-
-def get_team_for_issue(issue):
-   
-    summary = issue.fields.summary or ""
-    description = ""
-
-    if issue.fields.description:
-        if isinstance(issue.fields.description, dict):
-            description = extract_text_from_jira_description(issue.fields.description)
-        else:
-            description = issue.fields.description
-
-    issue_text = summary + " " + description
-    issue_emb = embed_text(issue_text)
-
-    best_team = None
-    best_score = -1
-    for team, skills in TEAM_SKILLS.items():
-        team_emb = embed_text(skills)
-        score = cosine_sim(issue_emb, team_emb)
-        if score > best_score:
-            best_score = score
-            best_team = team
-
-    if best_score < 0.3:
-        return "General"
-
-    return best_team
-
-
-def rebalance_sprint(sprint_id):
-   
-
-    jql = f'project = "{PROJECT_KEY}" AND sprint = {sprint_id}'
-    issues = jira.search_issues(jql, maxResults=False)
-
-    print(f"Found {len(issues)} issues in sprint {sprint_id}")
-
-   
-    team_issues = defaultdict(list)
-    for issue in issues:
-        team = get_team_for_issue(issue)
-        team_issues[team].append(issue)
-
-    for team, team_issues_list in team_issues.items():
-        members = TEAM_MEMBERS.get(team, TEAM_MEMBERS["General"])
+REBALANCE_TOLERANCE = int(os.getenv("REBALANCE_TOLERANCE", 1))  # allowed open-issue spread within a team
+
+def issue_text(issue):
+    fields = issue.get("fields", {})
+    summary = fields.get("summary") or ""
+    description = fields.get("description") or ""
+    if isinstance(description, dict):
+        description = issue_description_text(issue["key"], fields.get("updated"), description, TEXT_MAX_CHARS)
+    return summary + " " + description
+
+
+def get_teams_for_issues(issues):
+    """Classify every issue with one batched embedding pass against the shared team centroids."""
+    return detect_teams([issue_text(issue) for issue in issues])
+
+
+def status_category(issue):
+    return ((issue.get("fields", {}).get("status") or {}).get("statusCategory") or {}).get("key")
+
+
+def assignee_email(issue):
+    return (issue.get("fields", {}).get("assignee") or {}).get("emailAddress")
+
+
+def sort_key(issue_key):
+    prefix, _, number = issue_key.rpartition("-")
+    return (prefix, int(number)) if number.isdigit() else (issue_key, 0)
+
+
+def plan_rebalance(issues, team_members=TEAM_MEMBERS, load=None, tolerance=REBALANCE_TOLERANCE):
+    """
+    Smallest set of moves that brings every team within `tolerance` open issues per member.
+
+    `issues` are (key, team, assignee email, movable) tuples for the sprint's open issues;
+    only movable (not yet started) issues are ever reassigned. `load` is each member's
+    current open issue count (derived from `issues` if omitted). Unassigned issues, and
+    movable ones sitting with someone outside their team, go to the team's least-loaded
+    member; after that one issue at a time moves from the most- to the least-loaded member
+    until the spread is within tolerance, so the number of writes follows the imbalance
+    rather than sprint size.
+    Members can sit in several teams and load is shared across them, so balancing one team
+    can unbalance another it was already checked against; teams are passed over again until
+    a whole pass moves nothing, which makes re-planning after the plan is applied a no-op.
+    An issue moved more than once appears once, with its final assignee.
+    Ties break on email and key, so the plan is deterministic.
+
+    Returns [{"key", "team", "from", "to"}].
+    """
+    if load is None:
+        load = defaultdict(int)
+        for _, _, email, _ in issues:
+            if email:
+                load[email] += 1
+    load = defaultdict(int, load)
+    tolerance = max(1, tolerance)
+    by_team = defaultdict(list)
+    for issue in sorted(issues, key=lambda i: sort_key(i[0])):
+        by_team[issue[1]].append(issue)
+    original = {key: email for key, _, email, _ in issues}
+    current = dict(original)
+    moved = {}  # key -> team, in order of first move
+
+    def move(key, team, target):
+        if current[key]:
+            load[current[key]] -= 1
+        load[target] += 1
+        current[key] = target
+        moved.setdefault(key, team)
+
+    def balance(team):
+        members = sorted(team_members.get(team, team_members.get("General", [])))
         if not members:
-            continue
-
-        assignments = {}
-        for i, issue in enumerate(team_issues_list):
-            member = members[i % len(members)]
-            jira.assign_issue(issue.key, member)
-            assignments[issue.key] = member
-
-        print(f"\nRebalanced team '{team}':")
-        for key, member in assignments.items():
-            print(f"  - {key} → {member}")
-
-    print("\nSprint rebalancing complete ")
+            return False
+        roster = set(members)
+        changed = False
+        movable = defaultdict(list)  # member -> keys that may move, newest (highest) key last
+        for key, _, _, can_move in by_team[team]:
+            email = current[key]
+            if email in roster:
+                if can_move:
+                    movable[email].append(key)
+                continue
+            if email and not can_move:
+                continue  # work already started elsewhere stays put
+            target = min(members, key=lambda m: (load[m], m))
+            move(key, team, target)
+            movable[target].append(key)
+            changed = True
+        while True:
+            donors = [m for m in members if movable[m]]
+            if not donors:
+                return changed
+            donor = max(donors, key=lambda m: (load[m], m))
+            target = min(members, key=lambda m: (load[m], m))
+            if load[donor] - load[target] <= tolerance:
+                return changed
+            key = movable[donor].pop()
+            move(key, team, target)
+            movable[target].append(key)
+            changed = True
+
+    while any([balance(team) for team in sorted(by_team, key=str)]):
+        pass
+    return [{"key": key, "team": team, "from": original[key], "to": current[key]}
+            for key, team in moved.items() if current[key] != original[key]]
+
+
+def rebalance_sprint(sprint_id, progress=None, dry_run=False, tolerance=REBALANCE_TOLERANCE, rate=WRITE_RATE):
+    """
+    Plan the minimal moves for a sprint and apply them unless dry_run. Returns the
+    bulk_assign report with the plan under "plan" (nothing is written on a dry run).
+    """
+    warm_up()
+
+    jql = f'project = "{PROJECT_KEY}" AND sprint = {sprint_id} AND statusCategory != Done'
+    issues = [it for it in jira_http.iter_issues(jql, fields="rebalance") if status_category(it) != "done"]
+
+    print(f"Found {len(issues)} open issues in sprint {sprint_id}")
+
+    teams = get_teams_for_issues(issues) if issues else []
+    plan = plan_rebalance([
+        (issue["key"], team, assignee_email(issue), status_category(issue) == "new")
+        for issue, team in zip(issues, teams)
+    ], tolerance=tolerance)
+
+    by_team = defaultdict(list)
+    for move in plan:
+        by_team[move["team"]].append(move)
+    for team, moves in by_team.items():
+        print(f"\nRebalance team '{team}':")
+        for move in moves:
+            print(f"  - {move['key']}: {move['from'] or 'Unassigned'} → {move['to']}")
+    if not plan:
+        print("\nSprint is already balanced.")
+
+    if dry_run:
+        return {"succeeded": [], "failed": [], "skipped": [], "plan": plan}
+
+    account_ids = get_directory().resolve(move["to"] for move in plan)
+    report = assign_many([(move["key"], account_ids.get(move["to"])) for move in plan], progress=progress, rate=rate)
+    for failure in report["failed"]:
+        print(f" Failed to update {failure['key']}: {failure['error']}")
+    print(f"\nSprint rebalancing complete: {summarize(report)}")
+    report["plan"] = plan
+    return report
 
 
 if __name__ == "__main__":
     sprint_id = input("Enter Sprint ID to rebalance: ").strip()
-    rebalance_sprint(sprint_id)
+    dry_run = input("Dry run? [y/N]: ").strip().lower() == "y"
+    rebalance_sprint(sprint_id, dry_run=dry_run)
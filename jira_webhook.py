@@ -0,0 +1,281 @@
+"""
+Jira issue webhook receiver: keeps the issue store (and optionally an in-memory NLQ
+dataset) current without polling.
+
+    python jira_webhook.py [--port 8765]
+    python jira_webhook.py --check
+
+Register http://<host>:<port>/webhook in Jira (System > WebHooks) for issue created,
+updated and deleted events. With JIRA_WEBHOOK_SECRET set, deliveries must carry a
+matching X-Hub-Signature (HMAC-SHA256 of the body). The receiver binds to 127.0.0.1
+unless JIRA_WEBHOOK_HOST says otherwise, and refuses a non-loopback bind without a
+secret. send_event() posts a synthetic event to a running receiver for local testing;
+--check replays malformed and out-of-order events against a scratch store and exits
+non-zero if any of them changes the stored row.
+"""
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from issue_store import IssueStore, get_store
+from jira_nlq import PROJECT_KEY, assign_teams, issue_text, normalize_issue
+
+
+WEBHOOK_HOST = os.getenv("JIRA_WEBHOOK_HOST", "127.0.0.1")
+WEBHOOK_PORT = int(os.getenv("JIRA_WEBHOOK_PORT", 8765))
+WEBHOOK_SECRET = os.getenv("JIRA_WEBHOOK_SECRET")
+WEBHOOK_PATH = "/webhook"
+SEEN_EVENTS = 10000  # delivery ids remembered for de-duplication
+
+CREATED = "jira:issue_created"
+UPDATED = "jira:issue_updated"
+DELETED = "jira:issue_deleted"
+
+
+def signature(body, secret) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def is_loopback(host) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def event_id(event, delivery_id=None):
+    """Jira's delivery id when given, else (event type, key, issue updated / event timestamp)."""
+    if delivery_id:
+        return delivery_id
+    issue = event.get("issue") or {}
+    updated = (issue.get("fields") or {}).get("updated") or event.get("timestamp")
+    return (event.get("webhookEvent"), issue.get("key"), updated)
+
+
+class WebhookApplier:
+    """
+    Applies issue webhook events to the issue store and, if attached, to an in-memory list
+    of normalized rows (the NLQ dataset). Only issues whose summary or description
+    changed are re-embedded; other edits keep their existing team. Redelivered events,
+    events older than the stored row, and created / updated events without `fields` or
+    `updated` are ignored.
+    """
+
+    def __init__(self, data=None, store=None, project=PROJECT_KEY):
+        self.store = store or get_store()
+        self.project = project
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()
+        self.stats = {"applied": 0, "embedded": 0, "deleted": 0, "duplicate": 0, "stale": 0, "ignored": 0}
+        self.attach(data)
+
+    def attach(self, data):
+        """Point the applier at a (new) dataset list, e.g. after an NLQ refresh."""
+        with self._lock:
+            self.data = data
+            self._positions = None
+
+    def _position(self, key):
+        if self.data is None:
+            return None
+        if self._positions is None:
+            self._positions = {r["key"]: i for i, r in enumerate(self.data)}
+        pos = self._positions.get(key)
+        # the list may have grown or been edited elsewhere since the map was built
+        if pos is None or pos >= len(self.data) or self.data[pos]["key"] != key:
+            self._positions = {r["key"]: i for i, r in enumerate(self.data)}
+            pos = self._positions.get(key)
+        return pos
+
+    def _current(self, key):
+        pos = self._position(key)
+        if pos is not None:
+            return self.data[pos]
+        return self.store.get(self.project, key)
+
+    def _remember(self, eid):
+        self._seen[eid] = True
+        while len(self._seen) > SEEN_EVENTS:
+            self._seen.popitem(last=False)
+
+    def apply(self, event, delivery_id=None) -> str:
+        """Apply one webhook payload; returns what happened to it."""
+        kind = event.get("webhookEvent")
+        issue = event.get("issue") or {}
+        key = issue.get("key")
+        if kind not in (CREATED, UPDATED, DELETED) or not key:
+            self.stats["ignored"] += 1
+            return "ignored"
+        if self.project and not key.startswith(f"{self.project}-"):
+            self.stats["ignored"] += 1
+            return "ignored"
+        with self._lock:
+            eid = event_id(event, delivery_id)
+            if eid in self._seen:
+                self.stats["duplicate"] += 1
+                return "duplicate"
+            result = self._delete(key) if kind == DELETED else self._upsert(issue)
+            # only remembered once applied, so Jira's retry of a failed delivery still goes through
+            self._remember(eid)
+            return result
+
+    def _delete(self, key):
+        self.store.delete(self.project, [key])
+        pos = self._position(key)
+        if pos is not None:
+            del self.data[pos]
+            self._positions = None
+        self.stats["deleted"] += 1
+        return "deleted"
+
+    def _upsert(self, issue):
+        row = normalize_issue(issue)
+        if not issue.get("fields") or row["updated"] is None:
+            # nothing to order it by, and applying it would blank the stored row
+            self.stats["ignored"] += 1
+            return "ignored"
+        old = self._current(row["key"])
+        if old and old.get("updated") and row["updated"] and row["updated"] < old["updated"]:
+            self.stats["stale"] += 1
+            return "stale"
+        text = issue_text(row["summary"], row["description"])
+        if old and old.get("team") and issue_text(old["summary"], old["description"]) == text:
+            row["team"] = old["team"]
+        else:
+            assign_teams([row])
+            self.stats["embedded"] += 1
+        self.store.upsert(self.project, [row])
+        if self.data is not None:
+            pos = self._position(row["key"])
+            if pos is None:
+                self.data.insert(0, row)  # newest first, like IssueStore.rows
+                self._positions = None
+            else:
+                self.data[pos] = row
+        self.stats["applied"] += 1
+        return "applied"
+
+
+def make_handler(applier, secret=WEBHOOK_SECRET):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if urlsplit(self.path).path != WEBHOOK_PATH:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if secret and not hmac.compare_digest(self.headers.get("X-Hub-Signature", ""), signature(body, secret)):
+                self.send_response(401)
+                self.end_headers()
+                return
+            try:
+                event = json.loads(body)
+            except ValueError:
+                self.send_response(400)
+                self.end_headers()
+                return
+            try:
+                result = applier.apply(event, self.headers.get("X-Atlassian-Webhook-Identifier"))
+                status = 200
+            except Exception as e:
+                print(f"⚠ Webhook event failed: {e}")
+                result, status = "error", 500  # Jira redelivers on 5xx
+            payload = json.dumps({"result": result}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(applier=None, port=WEBHOOK_PORT, host=WEBHOOK_HOST, secret=WEBHOOK_SECRET, background=False):
+    """Start the receiver; with background=True it runs on a daemon thread and the server is returned."""
+    if not secret and not is_loopback(host):
+        raise ValueError(f"Refusing to accept unsigned webhooks on {host}: set JIRA_WEBHOOK_SECRET or bind to 127.0.0.1")
+    applier = applier or WebhookApplier()
+    server = ThreadingHTTPServer((host, port), make_handler(applier, secret))
+    server.applier = applier
+    if background:
+        threading.Thread(target=server.serve_forever, name="jira-webhook", daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def issue_event(kind, key, summary="", description="", updated=None, **fields):
+    """A minimal webhook payload shaped like Jira's, for send_event()."""
+    updated = updated or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+    fields = dict(summary=summary, description=description, updated=updated, created=updated, **fields)
+    return {
+        "webhookEvent": {"created": CREATED, "updated": UPDATED, "deleted": DELETED}[kind],
+        "timestamp": int(datetime.now(timezone.utc).timestamp() * 1000),
+        "issue": {"key": key, "fields": fields},
+    }
+
+
+def send_event(url, event, secret=WEBHOOK_SECRET, delivery_id=None):
+    """Fake Jira sender: POST one event to a receiver and return its result string."""
+    body = json.dumps(event).encode()
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Hub-Signature"] = signature(body, secret)
+    if delivery_id:
+        headers["X-Atlassian-Webhook-Identifier"] = delivery_id
+    r = requests.post(url, data=body, headers=headers, timeout=10)
+    if r.status_code not in (200, 500):
+        r.raise_for_status()
+    return r.json()["result"]
+
+
+def check() -> int:
+    """Events that must leave a stored row alone; returns how many of them changed it."""
+    store = IssueStore(":memory:")
+    applier = WebhookApplier(data=[], store=store, project="CHECK")
+    good = issue_event("created", "CHECK-1", "Login fails", "SSO redirect loops", updated="2024-05-02T10:00:00.000+0000",
+                       status={"name": "In Progress", "statusCategory": {"name": "In Progress"}})["issue"]
+    row = dict(normalize_issue(good), team="Backend")  # stored with a team, so nothing needs the model
+    store.upsert("CHECK", [row])
+    applier.attach([dict(row)])
+    event = lambda fields: {"webhookEvent": UPDATED, "issue": {"key": "CHECK-1", **fields}}
+    cases = [
+        ("no fields", event({})),
+        ("empty fields", event({"fields": {}})),
+        ("fields without updated", event({"fields": {"summary": "Login fails", "description": "SSO redirect loops"}})),
+        ("unparseable updated", event({"fields": dict(good["fields"], updated="yesterday", summary="")})),
+        ("older update", event({"fields": dict(good["fields"], updated="2024-05-01T10:00:00.000+0000", summary="")})),
+    ]
+    failed = 0
+    for i, (name, payload) in enumerate(cases):
+        result = applier.apply(payload, delivery_id=f"check-{i}")
+        kept = store.get("CHECK", "CHECK-1") == row and applier.data[0] == row
+        failed += not kept
+        print(f"  {name:<24}{result:<10}{'kept' if kept else 'OVERWROTE the stored row'}")
+    return failed
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--check" in args:
+        sys.exit(1 if check() else 0)
+    port = int(args[args.index("--port") + 1]) if "--port" in args else WEBHOOK_PORT
+    print(f"📡 Listening for Jira webhooks on http://{WEBHOOK_HOST}:{port}{WEBHOOK_PATH} (project {PROJECT_KEY})")
+    serve(port=port)
@@ -2,6 +2,8 @@ import streamlit as st
 from jira import JIRA
 import os
 from dotenv import load_dotenv
+import jira_http
+from adf import adf_to_text
 
 load_dotenv()
 JIRA_URL = os.getenv("JIRA_URL").rstrip("/")
@@ -31,23 +33,11 @@ Scroll down to see **Active Sprint Tickets** below.
 st.divider()
 
 
-def get_all_sprint_issues(jira_client, project_key, sprint_id):
+def get_all_sprint_issues(project_key, sprint_id):
     all_issues = []
-    start_at = 0
-    batch_size = 50
-
-    while True:
-        issues = jira_client.search_issues(
-            f'project = "{project_key}" AND sprint = {sprint_id}',
-            startAt=start_at,
-            maxResults=batch_size
-        )
-        if not issues:
-            break
-        all_issues.extend(issues)
-        start_at += len(issues)
-        if len(issues) < batch_size:
-            break
+    jql = f'project = "{project_key}" AND sprint = {sprint_id}'
+    for page in jira_http.search_pages(jql, fields="sprint-board"):
+        all_issues.extend(page.get("issues", []))
     return all_issues
 
 st.header("Tickets in Active Sprints")
@@ -61,7 +51,7 @@ else:
     for sprint in active_sprints:
         st.subheader(f"🟢 Sprint: {sprint.name}")
 
-        issues = get_all_sprint_issues(jira_client, PROJECT_KEY, sprint.id)
+        issues = get_all_sprint_issues(PROJECT_KEY, sprint.id)
 
         if not issues:
             st.write("No tickets in this sprint.")
@@ -69,14 +59,15 @@ else:
 
         sprint_data = []
         for issue in issues:
+            fields = issue["fields"]
             sprint_data.append({
-                "Key": issue.key,
-                "Summary": issue.fields.summary,
-                "Type": issue.fields.issuetype.name,
-                "Assignee": issue.fields.assignee.displayName if issue.fields.assignee else "Unassigned",
-                "Status": issue.fields.status.name,
+                "Key": issue["key"],
+                "Summary": fields.get("summary"),
+                "Type": (fields.get("issuetype") or {}).get("name"),
+                "Assignee": (fields.get("assignee") or {}).get("displayName") or "Unassigned",
+                "Status": (fields.get("status") or {}).get("name"),
                 "Sprint": sprint.name,
-                "Description": issue.fields.description or ""
+                "Description": adf_to_text(fields.get("description"))
             })
 
         st.dataframe(sprint_data, use_container_width=True)
@@ -0,0 +1,449 @@
+import itertools
+import threading
+
+import numpy as np
+
+from aggregates import Aggregates
+
+
+MISSING = np.iinfo(np.int64).min  # timestamp sentinel: compares below every real time
+
+
+def to_micros(dt) -> int:
+    """datetime -> int64 microseconds since the epoch; the same rounding as timestamp_column."""
+    return MISSING if dt is None else round(dt.timestamp() * 1e6)
+
+
+def timestamp_column(values):
+    seconds = np.fromiter((np.nan if v is None else v.timestamp() for v in values), dtype=np.float64, count=len(values))
+    missing = np.isnan(seconds)
+    micros = np.rint(np.where(missing, 0, seconds) * 1e6).astype(np.int64)
+    micros[missing] = MISSING
+    return micros
+
+
+EMPTY = np.zeros(0, dtype=np.int64)
+PATCH_LIMIT = 64  # pending row deltas a Columns view is patched with; past that it is rebuilt
+
+
+def _with(ids, i):
+    return np.insert(ids, np.searchsorted(ids, i), i)
+
+
+def _without(ids, i):
+    return np.delete(ids, np.searchsorted(ids, i))
+
+
+def _shift(ids, i, by):
+    """Sorted row ids at or after position i moved by `by` (an insert or delete at i)."""
+    if not len(ids) or ids[-1] < i:
+        return ids
+    return ids + by * (ids >= i)
+
+
+_versions = itertools.count(1)  # shared by every dataset, so a version never repeats across reloads
+
+
+class Categorical:
+    """
+    Integer codes for one column; every distinct value, None included, gets a code.
+    Row ids per value come from a hash index built on first use: exact (by code) and
+    case-insensitive (None and "" share the key ""). Id arrays are sorted, i.e. in data order.
+    """
+
+    def __init__(self, values):
+        values = list(values)
+        self.categories = list(dict.fromkeys(values))  # first-occurrence order
+        self.lookup = {v: i for i, v in enumerate(self.categories)}
+        self.codes = np.fromiter(map(self.lookup.__getitem__, values), dtype=np.int32, count=len(values))
+        self._by_code = None
+        self._by_key = None
+        self._shared = False  # codes still belong to the Categorical this was copied from
+
+    def copy(self):
+        other = object.__new__(Categorical)
+        other.categories = list(self.categories)
+        other.lookup = dict(self.lookup)
+        other.codes = self.codes
+        other._shared = True
+        other._by_code = None if self._by_code is None else list(self._by_code)
+        other._by_key = None if self._by_key is None else dict(self._by_key)
+        return other
+
+    def code(self, value):
+        return self.lookup.get(value, -1)
+
+    def _add(self, value):
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.categories)
+            self.categories.append(value)
+            if self._by_code is not None:
+                self._by_code.append(EMPTY)
+        return code
+
+    def _index_add(self, code, i):
+        self._by_code[code] = _with(self._by_code[code], i)
+        key = (self.categories[code] or "").lower()
+        self._by_key[key] = _with(self._by_key.get(key, EMPTY), i)
+
+    def _index_remove(self, code, i):
+        self._by_code[code] = _without(self._by_code[code], i)
+        key = (self.categories[code] or "").lower()
+        self._by_key[key] = _without(self._by_key[key], i)
+
+    def set(self, i, value):
+        old, code = self.codes[i], self._add(value)
+        if self._shared:
+            self.codes, self._shared = self.codes.copy(), False
+        self.codes[i] = code
+        if self._by_code is not None and old != code:
+            self._index_remove(old, i)
+            self._index_add(code, i)
+
+    def insert(self, i, value):
+        code = self._add(value)
+        self.codes, self._shared = np.insert(self.codes, i, code), False
+        if self._by_code is not None:
+            self._by_code = [_shift(ids, i, 1) for ids in self._by_code]
+            self._by_key = {key: _shift(ids, i, 1) for key, ids in self._by_key.items()}
+            self._index_add(code, i)
+
+    def delete(self, i):
+        code = self.codes[i]
+        self.codes, self._shared = np.delete(self.codes, i), False
+        if self._by_code is not None:
+            self._index_remove(code, i)
+            self._by_code = [_shift(ids, i, -1) for ids in self._by_code]
+            self._by_key = {key: _shift(ids, i, -1) for key, ids in self._by_key.items()}
+
+    def _index(self):
+        if self._by_code is None:
+            order = np.argsort(self.codes, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(self.codes, minlength=len(self.categories)))])
+            by_code = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.categories))]
+            by_key = {}
+            for value, ids in zip(self.categories, by_code):
+                key = (value or "").lower()
+                by_key[key] = np.union1d(by_key[key], ids) if key in by_key else ids
+            self._by_code, self._by_key = by_code, by_key
+        return self._by_code, self._by_key
+
+    def ids(self, value):
+        code = self.code(value)
+        return self._index()[0][code] if code >= 0 else EMPTY
+
+    def ids_ci(self, value):
+        """Rows whose value matches `value` case-insensitively (None matches "")."""
+        return self._index()[1].get((value or "").lower(), EMPTY)
+
+    def value_counts(self, rows=None, skip_empty=False):
+        """[(value, count)] over the given row ids (all rows if None), in order of first occurrence."""
+        codes = self.codes if rows is None else self.codes[rows]
+        if not len(codes):
+            return []
+        present, first = np.unique(codes, return_index=True)
+        counts = np.bincount(codes, minlength=len(self.categories))
+        out = [(self.categories[c], int(counts[c])) for c in present[np.argsort(first, kind="stable")]]
+        return [(v, n) for v, n in out if v] if skip_empty else out
+
+
+class Columns:
+    """
+    Column-wise snapshot of normalized NLQ rows: categorical codes for the fields the
+    handlers filter and group on, int64 microsecond timestamps (MISSING when absent) for
+    created / updated / resolved.
+
+    Lookups return sorted row-id arrays from hash indexes (sprint, assignee name and email,
+    team, status, status category) or from binary search over the time columns, which are
+    kept pre-sorted; follow-up filters only touch the ids found, so a question costs about
+    as much as its answer is large. Indexes are built on first use. A snapshot is never
+    edited once handed out: patched() derives the next one from row-level deltas, shifting
+    ids and moving single entries in the built indexes instead of rebuilding them.
+    """
+
+    FIELDS = {
+        "status_category": lambda r: r["statusCategory"],
+        "status": lambda r: r["status"],
+        "team": lambda r: r["team"],
+        "sprint": lambda r: r["sprint"],
+        "assignee_name": lambda r: r["assigneeName"],
+        "assignee_email": lambda r: r["assigneeEmail"],
+        # the member identity the handlers report: email, else display name
+        "member": lambda r: r["assigneeEmail"] or r["assigneeName"],
+    }
+    TIMES = ("created", "updated", "resolved")
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.n = len(rows)
+        for name, value in self.FIELDS.items():
+            setattr(self, name, Categorical([value(r) for r in rows]))
+        for field in self.TIMES:
+            setattr(self, field, timestamp_column([r[field] for r in rows]))
+        self._time_order = {}
+
+    def patched(self, rows, deltas):
+        """
+        The snapshot for `rows`, derived from this one and the ("set", i, row) /
+        ("insert", i, row) / ("delete", i) deltas that turned its rows into `rows`.
+        """
+        new = object.__new__(Columns)
+        new.rows = rows
+        new.n = len(rows)
+        for name in self.FIELDS:
+            setattr(new, name, getattr(self, name).copy())
+        for field in self.TIMES:
+            setattr(new, field, getattr(self, field))
+        new._shared = set(self.TIMES)  # time columns copied on their first in-place edit
+        new._time_order = dict(self._time_order)
+        for delta in deltas:
+            getattr(new, "_" + delta[0])(*delta[1:])
+        del new._shared
+        return new
+
+    def _set(self, i, row):
+        for name, value in self.FIELDS.items():
+            getattr(self, name).set(i, value(row))
+        for field in self.TIMES:
+            t = to_micros(row[field])
+            self._time_remove(field, i, getattr(self, field)[i])
+            if field in self._shared:
+                setattr(self, field, getattr(self, field).copy())
+                self._shared.discard(field)
+            getattr(self, field)[i] = t
+            self._time_add(field, i, t)
+
+    def _insert(self, i, row):
+        for name, value in self.FIELDS.items():
+            getattr(self, name).insert(i, value(row))
+        for field in self.TIMES:
+            t = to_micros(row[field])
+            setattr(self, field, np.insert(getattr(self, field), i, t))
+            self._shared.discard(field)
+            if field in self._time_order:
+                order, values = self._time_order[field]
+                self._time_order[field] = (order + (order >= i), values)
+            self._time_add(field, i, t)
+
+    def _delete(self, i):
+        for name in self.FIELDS:
+            getattr(self, name).delete(i)
+        for field in self.TIMES:
+            self._time_remove(field, i, getattr(self, field)[i])
+            setattr(self, field, np.delete(getattr(self, field), i))
+            self._shared.discard(field)
+            if field in self._time_order:
+                order, values = self._time_order[field]
+                self._time_order[field] = (order - (order > i), values)
+
+    def _time_add(self, field, i, t):
+        if field in self._time_order:
+            order, values = self._time_order[field]
+            at = np.searchsorted(values, t, "right")
+            self._time_order[field] = (np.insert(order, at, i), np.insert(values, at, t))
+
+    def _time_remove(self, field, i, t):
+        if field in self._time_order:
+            order, values = self._time_order[field]
+            lo, hi = np.searchsorted(values, t, "left"), np.searchsorted(values, t, "right")
+            at = lo + int(np.flatnonzero(order[lo:hi] == i)[0])
+            self._time_order[field] = (np.delete(order, at), np.delete(values, at))
+
+    def build_indexes(self):
+        """Build every lookup index now instead of on first use."""
+        for column in (self.status_category, self.status, self.team, self.sprint, self.assignee_name, self.assignee_email):
+            column._index()
+        for field in self.TIMES:
+            self._sorted_time(field)
+        return self
+
+    def _sorted_time(self, field):
+        if field not in self._time_order:
+            values = getattr(self, field)
+            order = np.argsort(values, kind="stable")
+            self._time_order[field] = (order, values[order])
+        return self._time_order[field]
+
+    def _time_range(self, field, lo, hi):
+        order, _ = self._sorted_time(field)
+        return np.sort(order[lo:hi])
+
+    def since(self, field, dt):
+        """Rows whose timestamp is present and >= dt."""
+        order, values = self._sorted_time(field)
+        return self._time_range(field, np.searchsorted(values, to_micros(dt), "left"), len(order))
+
+    def count_since(self, field, dt):
+        _, values = self._sorted_time(field)
+        return len(values) - int(np.searchsorted(values, to_micros(dt), "left"))
+
+    def before(self, field, dt):
+        """Rows whose timestamp is present and < dt."""
+        _, values = self._sorted_time(field)
+        return self._time_range(field, np.searchsorted(values, MISSING, "right"), np.searchsorted(values, to_micros(dt), "left"))
+
+    def between(self, field, start, end):
+        """Rows with start <= timestamp <= end."""
+        _, values = self._sorted_time(field)
+        return self._time_range(field, np.searchsorted(values, to_micros(start), "left"), np.searchsorted(values, to_micros(end), "right"))
+
+    def category(self, name):
+        return self.status_category.ids(name)
+
+    def where(self, rows, column, value, keep=True):
+        """The ids in rows whose column equals value (or, with keep=False, does not)."""
+        column = getattr(self, column)
+        hit = column.codes[rows] == column.code(value)
+        return rows[hit if keep else ~hit]
+
+    def where_time(self, rows, field, dt, since=True):
+        """The ids in rows whose timestamp is >= dt (since) or present and < dt."""
+        values = getattr(self, field)[rows]
+        t = to_micros(dt)
+        return rows[values >= t] if since else rows[(values != MISSING) & (values < t)]
+
+    def backlog(self):
+        return self.where(self.category("To Do"), "sprint", None)
+
+    def matching(self, rows):
+        """Row dicts for the ids, in data order."""
+        return [self.rows[i] for i in rows]
+
+
+class NLQDataset(list):
+    """
+    The NLQ dataset: still a plain list of row dicts for every existing caller, plus a
+    `version` that moves on each mutation and a Columns view brought up to the version it
+    was asked at. Rows are replaced, not edited in place, when they change.
+    Versions are unique across datasets, so a freshly loaded one never matches an old one.
+
+    Aggregates, once built, are not rebuilt: every mutator hands the rows it adds and
+    removes to them as deltas. The Columns view is patched with the same row-level deltas
+    the next time it is asked for; only reordering, slice edits or more than PATCH_LIMIT
+    pending deltas rebuild it.
+    """
+
+    def __init__(self, rows=()):
+        super().__init__(rows)
+        self.version = next(_versions)
+        self._columns = None
+        self._deltas = None  # row deltas since the Columns view was made; None: rebuild it
+        self._aggregates = None
+        self._lock = threading.Lock()
+        self._writing = threading.RLock()  # a mutation and its delta land together, never mid-build
+
+    def _changed(self, added=(), removed=(), delta=None):
+        self.version = next(_versions)
+        if delta is None or self._deltas is None or len(self._deltas) >= PATCH_LIMIT:
+            self._deltas = None
+        else:
+            self._deltas.append(delta)
+        aggregates = self._aggregates
+        if aggregates is not None:
+            for row in removed:
+                aggregates.remove(row)
+            for row in added:
+                aggregates.add(row)
+
+    def columns(self) -> Columns:
+        with self._lock:
+            with self._writing:
+                version = self.version
+                if self._columns is not None and self._columns[0] == version:
+                    return self._columns[1]
+                rows, deltas = list.copy(self), self._deltas
+                self._deltas = []  # later mutations are deltas against the view made here
+            if self._columns is None or deltas is None:
+                view = Columns(rows)
+            else:
+                view = self._columns[1].patched(rows, deltas)
+            self._columns = (version, view)
+            return view
+
+    def aggregates(self) -> Aggregates:
+        with self._writing:
+            if self._aggregates is None:
+                self._aggregates = Aggregates(list.copy(self))
+            return self._aggregates
+
+    def append(self, row):
+        with self._writing:
+            super().append(row)
+            self._changed(added=(row,), delta=("insert", len(self) - 1, row))
+
+    def extend(self, rows):
+        rows = list(rows)
+        with self._writing:
+            for row in rows:
+                self.append(row)
+
+    def insert(self, index, row):
+        with self._writing:
+            size = len(self)
+            at = max(0, index + size) if index < 0 else min(index, size)
+            super().insert(index, row)
+            self._changed(added=(row,), delta=("insert", at, row))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+        with self._writing:
+            old = self[index]
+            super().__setitem__(index, value)
+            if isinstance(index, slice):
+                self._changed(added=value, removed=old)
+            else:
+                at = index + len(self) if index < 0 else index
+                self._changed(added=(value,), removed=(old,), delta=("set", at, value))
+
+    def __delitem__(self, index):
+        with self._writing:
+            old = self[index]
+            at = index + len(self) if not isinstance(index, slice) and index < 0 else index
+            super().__delitem__(index)
+            if isinstance(index, slice):
+                self._changed(removed=old)
+            else:
+                self._changed(removed=(old,), delta=("delete", at))
+
+    def __iadd__(self, rows):
+        self.extend(rows)
+        return self
+
+    def pop(self, index=-1):
+        with self._writing:
+            row = self[index]
+            del self[index]
+        return row
+
+    def remove(self, row):
+        with self._writing:
+            del self[self.index(row)]
+
+    def clear(self):
+        with self._writing:
+            super().clear()
+            self._changed()
+            if self._aggregates is not None:
+                self._aggregates = Aggregates()
+
+    def sort(self, **kwargs):
+        with self._writing:
+            super().sort(**kwargs)
+            self._changed()
+
+    def reverse(self):
+        with self._writing:
+            super().reverse()
+            self._changed()
+
+
+def columns(data) -> Columns:
+    """Cached columns for an NLQDataset; a one-off view for any other list of rows."""
+    return data.columns() if isinstance(data, NLQDataset) else Columns(list(data))
+
+
+def aggregates(data) -> Aggregates:
+    """Maintained aggregates for an NLQDataset; one-off counts for any other list of rows."""
+    return data.aggregates() if isinstance(data, NLQDataset) else Aggregates(list(data))
@@ -3,6 +3,11 @@ from datetime import date
 from jira import JIRA
 from jira_assign import JiraAutoAssigner
 from jira_sprint_rebalance import rebalance_sprint
+from bulk_assign import summarize
+from jira_ai_analyze import fetch_all_tickets
+from ticket_index import TicketIndex
+import jira_http
+from adf import adf_to_text
 import os
 from dotenv import load_dotenv
 
@@ -17,27 +22,45 @@ jira_client = JIRA(server=JIRA_URL, basic_auth=(EMAIL, API_TOKEN))
 
 st.title("Home - Ticket Management")
 
+
+def progress_bar():
+    bar = st.progress(0.0, text="Updating Jira...")
+    return lambda done, total, key, outcome: bar.progress(done / total, text=f"{done}/{total} · {key} {outcome}")
+
+
+def show_report(report, action):
+    if report["failed"]:
+        st.warning(f"⚠ {action}: {summarize(report)}")
+        st.dataframe(report["failed"], use_container_width=True)
+    else:
+        st.success(f"✅ {action}: {summarize(report)}")
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.header("Assign Tickets")
     if st.button("Auto-assign tickets"):
         try:
-            JiraAutoAssigner().run()
-            st.success("✅ Tickets assigned successfully!")
+            show_report(JiraAutoAssigner().run(progress=progress_bar()), "Tickets assigned")
         except Exception as e:
             st.error(f" Failed to assign: {e}")
 
 with col2:
     st.header("Rebalance Sprint")
     sprint_id = st.text_input("Enter Sprint ID")
+    dry_run = st.checkbox("Dry run (show the moves without changing Jira)")
     if st.button("Rebalance tickets"):
         if not sprint_id:
             st.warning("⚠ Please enter a sprint ID first")
         else:
             try:
-                rebalance_sprint(sprint_id)
-                st.success("✅ Tickets rebalanced successfully!")
+                report = rebalance_sprint(sprint_id, progress=None if dry_run else progress_bar(), dry_run=dry_run)
+                if dry_run:
+                    st.info(f"{len(report['plan'])} move(s) planned.")
+                else:
+                    show_report(report, "Tickets rebalanced")
+                if report["plan"]:
+                    st.dataframe(report["plan"], use_container_width=True)
             except Exception as e:
                 st.error(f"Failed to rebalance: {e}")
 
@@ -48,9 +71,20 @@ summary = st.text_input("Summary")
 description = st.text_area("Description")
 issue_type = st.selectbox("Type", ["Bug", "Feature", "Task", "Request"])
 
+duplicates = []
+if summary.strip():
+    if "duplicate_index" not in st.session_state:  # the Analyzer keeps its own ticket_index
+        st.session_state.duplicate_index = TicketIndex.from_records(fetch_all_tickets())
+    duplicates = st.session_state.duplicate_index.find_duplicates(summary, description)
+if duplicates:
+    st.warning("⚠ This looks like a duplicate of:\n" + "\n".join(f"- {key} (similarity {score:.2f})" for key, score in duplicates))
+create_anyway = st.checkbox("Create even though similar tickets exist") if duplicates else True
+
 if st.button("Create Manual Ticket"):
     if not summary.strip() or not description.strip():
         st.warning("⚠ Summary and Description are required")
+    elif not create_anyway:
+        st.warning("⚠ Review the likely duplicates above, or tick the box to create anyway")
     else:
         new_issue = jira_client.create_issue(
             project=PROJECT_KEY,
@@ -58,24 +92,22 @@ if st.button("Create Manual Ticket"):
             description=description,
             issuetype={"name": issue_type}
         )
+        st.session_state.pop("duplicate_index", None)  # include the new ticket next time
         st.success(f"✅ Ticket {new_issue.key} created in backlog!")
 
 st.divider()
 
 st.header("Backlog Tickets")
-backlog_issues = jira_client.search_issues(
-    f'project = "{PROJECT_KEY}" AND sprint IS EMPTY AND statusCategory = "To Do"',
-    maxResults=100
-)
+BACKLOG_JQL = f'project = "{PROJECT_KEY}" AND sprint IS EMPTY AND statusCategory = "To Do"'
 backlog_data = [
     {
-        "Key": issue.key,
-        "Summary": issue.fields.summary,
-        "Type": issue.fields.issuetype.name,
-        "Assignee": issue.fields.assignee.displayName if issue.fields.assignee else "Unassigned",
-        "Description": issue.fields.description or ""
+        "Key": issue["key"],
+        "Summary": issue["fields"].get("summary"),
+        "Type": (issue["fields"].get("issuetype") or {}).get("name"),
+        "Assignee": (issue["fields"].get("assignee") or {}).get("displayName") or "Unassigned",
+        "Description": adf_to_text(issue["fields"].get("description"))
     }
-    for issue in backlog_issues
+    for issue in jira_http.iter_issues(BACKLOG_JQL, fields="backlog")
 ]
 st.table(backlog_data)
 
@@ -102,18 +134,17 @@ if st.button("Add Backlog to Sprint"):
             st.info(f"Created new sprint '{sprint_name}' starting today")
 
         
-        backlog_issues = jira_client.search_issues(
-            f'project = "{PROJECT_KEY}" AND sprint IS EMPTY AND statusCategory = "To Do"',
-            maxResults=100
-        )
-
-        
-        sprint_issues = jira_client.search_issues(f'project = "{PROJECT_KEY}" AND sprint = {sprint.id}')
-        sprint_keys = [i.key for i in sprint_issues]
-        issue_keys_to_add = [i.key for i in backlog_issues if i.key not in sprint_keys]
+        sprint_keys = {
+            i["key"] for i in jira_http.iter_issues(f'project = "{PROJECT_KEY}" AND sprint = {sprint.id}', fields="picker")
+        }
+        issue_keys_to_add = [
+            i["key"] for i in jira_http.iter_issues(BACKLOG_JQL, fields="picker") if i["key"] not in sprint_keys
+        ]
 
         if issue_keys_to_add:
-            jira_client.add_issues_to_sprint(sprint.id, issue_keys_to_add)
+            # the agile API accepts at most 50 issues per call
+            for start in range(0, len(issue_keys_to_add), 50):
+                jira_client.add_issues_to_sprint(sprint.id, issue_keys_to_add[start:start + 50])
             st.success(f"✅ {len(issue_keys_to_add)} backlog tickets added to sprint '{sprint_name}'")
         else:
             st.info("No tickets in backlog to add")
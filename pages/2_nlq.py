@@ -1,6 +1,6 @@
 import streamlit as st
 import re
-from jira_nlq import answer_query, load_dataset, HELP_TEXT
+from jira_nlq import ANSWER_CACHE, answer_query, load_dataset, HELP_TEXT
 
 
 if "jira_data" not in st.session_state:
@@ -14,6 +14,9 @@ if st.button("Run Query") and query.strip():
     result = answer_query(query, st.session_state.jira_data)
     st.write("### Answer")
     st.write(result)
+    stats = ANSWER_CACHE.stats()
+    st.caption(f"Answer cache: {stats['hit_rate']:.0%} hit rate ({stats['hits']} of {stats['hits'] + stats['misses']}), "
+               f"{stats['size']}/{stats['maxsize']} answers kept")
 
 
 if st.button("Show Examples"):
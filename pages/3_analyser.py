@@ -1,5 +1,16 @@
+import hashlib
 import streamlit as st
 from jira_ai_analyze import fetch_all_tickets, analyze_ticket
+from ticket_index import TicketIndex, ticket_text
+
+
+def get_ticket_index(tickets):
+    # Rebuild only when ticket keys or text changed; vectors come from the embedding cache.
+    signature = hashlib.sha1("\0".join(f"{t['key']}\0{ticket_text(t)}" for t in tickets).encode("utf-8")).hexdigest()
+    if "ticket_index" not in st.session_state or st.session_state.get("ticket_index_signature") != signature:
+        st.session_state.ticket_index = TicketIndex.from_records(tickets)
+        st.session_state.ticket_index_signature = signature
+    return st.session_state.ticket_index
 
 st.title("🧠 AI Ticket Analyzer")
 
@@ -24,6 +35,22 @@ else:
     st.write(f"**Created:** {chosen_ticket.get('created', 'N/A')}")
     st.write(f"**Description:** {chosen_ticket.get('description', 'No description')}")
 
+    st.write("### Similar Past Tickets")
+    by_key = {t["key"]: t for t in tickets}
+    similar = get_ticket_index(tickets).similar_to(chosen_ticket["key"], k=5)
+    if similar:
+        st.table([
+            {
+                "Key": key,
+                "Summary": by_key[key].get("summary", ""),
+                "Status": by_key[key].get("status", ""),
+                "Similarity": f"{score:.2f}",
+            }
+            for key, score in similar
+        ])
+    else:
+        st.info("No similar tickets found.")
+
     if st.button("Run AI Analysis"):
         insights = analyze_ticket(
             chosen_ticket.get("summary", ""),
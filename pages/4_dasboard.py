@@ -3,6 +3,8 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 from sprint_report import generate_scrum_sprint_report
+from jira_nlq import load_dataset, sync_dataset
+from nlq_dataset import aggregates
 
 st.title("📊 Dashboard - Jira Metrics")
 
@@ -27,15 +29,17 @@ def plot_pie_chart(data_dict, title):
     st.pyplot(fig)
 
 if st.button("Generate Report"):
-    from jira_ai_analyze import fetch_all_tickets
-
-    tickets = fetch_all_tickets()  # list of dicts
-    tickets_df = pd.DataFrame(tickets)
+    # shared with the NLQ page; issues changed since the last sync are applied as deltas
+    if "jira_data" not in st.session_state:
+        st.session_state.jira_data = load_dataset()
+    else:
+        sync_dataset(st.session_state.jira_data)
+    data = st.session_state.jira_data
 
-    if tickets_df.empty:
+    if not data:
         st.warning("No tickets found. Please check your Jira connection or filters.")
     else:
-        metrics = generate_scrum_sprint_report(tickets_df, sprint, start, end)
+        metrics = generate_scrum_sprint_report(aggregates(data), sprint, start, end)
 
         # ---- Charts in two columns ----
         col1, col2 = st.columns(2)
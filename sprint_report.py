@@ -1,85 +1,46 @@
-
 import pandas as pd
-from teams import TEAM_MEMBERS, TEAM_SKILLS
-from embeddings import embed_text, cosine_sim, extract_text_from_jira_description
-
-def detect_team(summary: str, description: str) -> str:
-    issue_text = f"{summary} {description}".strip()
-    issue_emb = embed_text(issue_text)
-    best_team, best_score = None, -1
-    for team, skills in TEAM_SKILLS.items():
-        team_emb = embed_text(skills)
-        score = cosine_sim(issue_emb, team_emb)
-        if score > best_score:
-            best_score = score
-            best_team = team
-    return best_team if best_score >= 0.3 else "General"
-
-def generate_scrum_sprint_report(tickets_df, sprint_name=None, start_date=None, end_date=None):
-    df = tickets_df.copy()
-
-    # --- Normalize sprint ---
-    if "sprint" in df.columns:
-        df["sprint"] = (
-            df["sprint"].astype(str)
-            .str.extract(r"([Ss]\d+)", expand=False)
-            .str.upper()
-        )
-
-    
-    df["team"] = df.apply(
-        lambda row: detect_team(
-            row.get("summary", ""), 
-            row.get("description", "")
-        ),
-        axis=1
-    )
-
-   
-    if "created" in df.columns:
-        df["created"] = pd.to_datetime(df["created"], errors="coerce")
-        if pd.api.types.is_datetime64_any_dtype(df["created"]):
-            df["created"] = df["created"].dt.tz_localize(None)
-
-    if "created" in df.columns:
-        print("📌 Data created range:", df["created"].min(), "→", df["created"].max())
-    print("📌 Unique sprints in data:", df["sprint"].dropna().unique())
-    print("📌 Unique teams detected:", df["team"].dropna().unique())
-
-    if sprint_name:
-        df = df[df["sprint"] == sprint_name.upper()]
-    if start_date:
-        start_dt = pd.to_datetime(str(start_date))
-        df = df[df["created"] >= start_dt]
-    if end_date:
-        end_dt = pd.to_datetime(str(end_date)) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-        df = df[df["created"] <= end_dt]
-
-    ticket_by_status = df["status"].value_counts().to_dict()
-    ticket_by_team = df["team"].value_counts().to_dict()
-
-    total_tickets = len(df)
-    closed_tickets = len(df[df["status"].str.lower() == "done"])
-    sprint_progress = (closed_tickets / total_tickets * 100) if total_tickets > 0 else 0
-
-    closed_by_person = df[df["status"].str.lower() == "done"].groupby("assignee").size().to_dict()
-    most_tickets_closed = dict(sorted(closed_by_person.items(), key=lambda x: x[1], reverse=True))
-
-    load_per_person = df[df["status"].str.lower() != "done"].groupby("assignee").size().to_dict()
-
-    open_tickets_list = df[df["status"].str.lower() != "done"].to_dict(orient="records")
-    closed_tickets_list = df[df["status"].str.lower() == "done"].to_dict(orient="records")
-
-    print("📊 ticket_by_status:", ticket_by_status)
-    print("📊 ticket_by_team:", ticket_by_team)
-    print("📊 sprint_progress:", sprint_progress)
+from aggregates import dashboard_sprint
+
+
+def _as_date(value):
+    if not value:
+        return None
+    return pd.to_datetime(str(value)).date()
+
+
+def generate_scrum_sprint_report(aggregates, sprint_name=None, start_date=None, end_date=None):
+    """
+    Sprint metrics from maintained aggregates (aggregates.Aggregates): only the (sprint,
+    created day) buckets in range are merged, and only their tickets are listed. The date
+    range is inclusive and matches on the day each ticket was created.
+    """
+    merged = aggregates.dashboard_report(sprint_name.upper() if sprint_name else None, _as_date(start_date), _as_date(end_date))
+
+    def by_count(counter):
+        return dict(sorted(sorted(counter.items(), key=lambda kv: str(kv[0])), key=lambda kv: kv[1], reverse=True))
+
+    closed_tickets = sum(merged.closed_by.values())
+    total_tickets = closed_tickets + sum(merged.open_by.values())
+    open_tickets_list, closed_tickets_list = [], []
+    for row in sorted(merged.rows.values(), key=lambda r: (r["created"] is None, r["created"] or 0, r["key"] or "")):
+        record = {
+            "key": row["key"],
+            "status": row["status"],
+            "assignee": row["assigneeName"] or "Unassigned",
+            "team": row["team"],
+            "sprint": dashboard_sprint(row["sprint"]),
+            "created": row["created"].replace(tzinfo=None) if row["created"] else None,
+            "summary": row["summary"],
+            "description": row["description"],
+        }
+        (closed_tickets_list if (row["status"] or "").lower() == "done" else open_tickets_list).append(record)
 
     return {
-        "ticket_by_status": ticket_by_status,
-        "ticket_by_team": ticket_by_team,
-        "sprint_progress": sprint_progress,
-        "most_tickets_closed": most_tickets_closed,
-        "load_per_person": load_per_person,
+        "ticket_by_status": by_count(merged.status),
+        "ticket_by_team": by_count(merged.team),
+        "sprint_progress": (closed_tickets / total_tickets * 100) if total_tickets > 0 else 0,
+        "most_tickets_closed": by_count(merged.closed_by),
+        "load_per_person": dict(sorted(merged.open_by.items())),
         "open_tickets_list": open_tickets_list,
         "closed_tickets_list": closed_tickets_list,
     }
@@ -0,0 +1,105 @@
+import numpy as np
+
+from embeddings import STORE_DTYPE, chunked_dot, embed_texts, normalize_rows
+
+
+DUPLICATE_THRESHOLD = 0.85  # cosine similarity above which a new ticket is flagged as a likely duplicate
+
+
+def ticket_text(ticket) -> str:
+    """Same text layout jira_nlq embeds, so both share cached vectors."""
+    return f"{ticket.get('summary') or ''}\n{ticket.get('description') or ''}".strip()
+
+
+class TicketIndex:
+    """
+    Top-k cosine search over ticket embeddings.
+
+    Vectors are kept as one contiguous, L2-normalized float32 matrix, so an exact query is
+    a single matrix-vector product plus an argpartition. With approximate=True the rows are
+    clustered (spherical k-means) and stored list by list; a query only scans the n_probe
+    closest lists, which keeps very large projects fast at a small recall cost.
+    dtype="float16" halves the resident matrix; scores are still computed in float32.
+    """
+
+    def __init__(self, keys, vectors, approximate=False, n_lists=None, n_probe=8, seed=0, dtype=STORE_DTYPE):
+        self.keys = list(keys)
+        self.matrix = np.ascontiguousarray(normalize_rows(vectors)) if len(self.keys) else np.zeros((0, 0), np.float32)
+        self.centroids = None
+        self.offsets = None
+        self.n_probe = n_probe
+        if approximate and len(self.keys) > 1:
+            self._build_lists(n_lists, seed)
+        self.matrix = self.matrix.astype(dtype, copy=False)
+        self.positions = {k: i for i, k in enumerate(self.keys)}
+
+    @classmethod
+    def from_records(cls, records, text_fn=ticket_text, **kwargs):
+        records = list(records)
+        return cls([r["key"] for r in records], embed_texts([text_fn(r) for r in records]), **kwargs)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _build_lists(self, n_lists, seed, iterations=10):
+        n = len(self.keys)
+        n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = self.matrix[rng.choice(n, size=min(n, 32 * n_lists), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+        for _ in range(iterations):
+            assign = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize_rows(sums)
+        assign = np.concatenate([
+            (self.matrix[i:i + 8192] @ centroids.T).argmax(axis=1) for i in range(0, n, 8192)
+        ])
+        order = np.argsort(assign, kind="stable")
+        self.matrix = np.ascontiguousarray(self.matrix[order])
+        self.keys = [self.keys[i] for i in order]
+        self.centroids = centroids
+        self.offsets = np.searchsorted(assign[order], np.arange(n_lists + 1))
+
+    def _candidates(self, query):
+        if self.centroids is None:
+            return None
+        lists = np.argsort(self.centroids @ query)[::-1][:self.n_probe]
+        return np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+
+    def search(self, vector, k=5, exclude=(), min_score=None):
+        """Returns up to k (key, score) pairs, best first."""
+        if not self.keys:
+            return []
+        query = normalize_rows(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+        rows = self._candidates(query)
+        scores = chunked_dot(self.matrix if rows is None else self.matrix[rows], query)
+        take = min(len(scores), k + len(exclude))
+        top = np.argpartition(-scores, take - 1)[:take]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for i in top:
+            key = self.keys[i if rows is None else rows[i]]
+            if key in exclude:
+                continue
+            if min_score is not None and scores[i] < min_score:
+                break
+            results.append((key, float(scores[i])))
+            if len(results) == k:
+                break
+        return results
+
+    def search_text(self, text, k=5, **kwargs):
+        return self.search(embed_texts([text])[0], k=k, **kwargs)
+
+    def similar_to(self, key, k=5, **kwargs):
+        """Nearest tickets to an indexed ticket, excluding the ticket itself."""
+        pos = self.positions.get(key)
+        if pos is None:
+            return []
+        return self.search(self.matrix[pos].astype(np.float32), k=k, exclude={key}, **kwargs)
+
+    def find_duplicates(self, summary, description="", k=3, threshold=DUPLICATE_THRESHOLD):
+        return self.search_text(ticket_text({"summary": summary, "description": description}), k=k, min_score=threshold)
@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jira_http
+from teams import TEAM_MEMBERS
+
+
+DIRECTORY_PATH = os.getenv("USER_DIRECTORY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".user_directory.json"))
+DIRECTORY_TTL = float(os.getenv("USER_DIRECTORY_TTL_HOURS", 24)) * 3600
+LOOKUP_WORKERS = 8
+
+
+def lookup_account_id(email):
+    """One /user/search round-trip; prefers the user whose email matches exactly."""
+    users = jira_http.get_json("/rest/api/3/user/search", params={"query": email})
+    if not users:
+        raise ValueError(f"No account found for email: {email}")
+    for user in users:
+        if (user.get("emailAddress") or "").lower() == email.lower():
+            return user["accountId"]
+    return users[0]["accountId"]
+
+
+class UserDirectory:
+    """
+    email -> Jira accountId, persisted as JSON next to the app. Entries older than ttl
+    seconds are looked up again; resolve() fetches every missing or expired email
+    concurrently, so a run costs one search per team member at most.
+    """
+
+    def __init__(self, path=DIRECTORY_PATH, ttl=DIRECTORY_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # lower-cased email -> [accountId, resolved at]
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    self._entries = json.load(fh)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def _fresh(self, email):
+        entry = self._entries.get(email.lower())
+        if entry and time.time() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self._entries, fh)
+        os.replace(tmp, self.path)
+
+    def resolve(self, emails, workers=LOOKUP_WORKERS):
+        """accountIds for the given emails; missing ones are looked up in parallel. Unknown emails are left out."""
+        emails = {e for e in emails if e}
+        with self._lock:
+            found = {e: self._fresh(e) for e in emails}
+        missing = [e for e, account_id in found.items() if account_id is None]
+        if missing:
+            def lookup(email):
+                try:
+                    return email, lookup_account_id(email)
+                except ValueError:
+                    return email, None
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(missing)))) as pool:
+                looked_up = list(pool.map(lookup, missing))
+            now = time.time()
+            with self._lock:
+                for email, account_id in looked_up:
+                    found[email] = account_id
+                    if account_id:
+                        self._entries[email.lower()] = [account_id, now]
+                self._save()
+        return {e: account_id for e, account_id in found.items() if account_id}
+
+    def account_id(self, email):
+        account_id = self.resolve([email]).get(email)
+        if account_id is None:
+            raise ValueError(f"No account found for email: {email}")
+        return account_id
+
+    def prefetch_team_members(self):
+        return self.resolve(m for members in TEAM_MEMBERS.values() for m in members)
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+def get_directory() -> UserDirectory:
+    global _directory
+    with _directory_lock:
+        if _directory is None:
+            _directory = UserDirectory()
+        return _directory